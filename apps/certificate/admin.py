@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Student, Certificate, Course
+from .models import Student, Certificate, Course, QRRenderJob
 
 
 @admin.register(Student)
@@ -21,6 +21,16 @@ class CertificateAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
     raw_id_fields = ('student', 'course', 'created_by')
     exclude = ('unique_code',)
+    # created_by is nullable, so the changelist would not follow it by itself
+    list_select_related = ('student', 'course', 'created_by')
+
+
+@admin.register(QRRenderJob)
+class QRRenderJobAdmin(admin.ModelAdmin):
+    list_display = ('certificate', 'status', 'attempts', 'queued_at', 'updated_at')
+    list_filter = ('status',)
+    ordering = ('queued_at',)
+    raw_id_fields = ('certificate',)
 
 
 admin.site.register(Course)
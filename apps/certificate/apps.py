@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CertificateConfig(AppConfig):
+    name = 'apps.certificate'
+    label = 'certificate'
+
+    def ready(self):
+        from . import signals  # noqa: F401
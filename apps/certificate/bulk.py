@@ -0,0 +1,177 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+
+from .jobs import enqueue_qr_renders_on_commit
+from .models import Student, Certificate, Course
+from .serializers import CertificateIssueRowSerializer, StudentImportRowSerializer
+from .utils import chunked
+from .validation import invalidate_certificates
+
+
+def iter_csv_rows(fileobj):
+    """Yield CSV rows as dicts, dropping empty cells."""
+    reader = csv.DictReader(
+        io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield {key: value for key, value in row.items()
+               if key and value not in ('', None)}
+
+
+def iter_ndjson_rows(fileobj):
+    """Yield one decoded object per non-blank NDJSON line."""
+    for line in io.TextIOWrapper(fileobj, encoding='utf-8-sig'):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # Let row validation reject it like any other malformed row
+            yield line
+
+
+ROW_READERS = {
+    'csv': iter_csv_rows,
+    'ndjson': iter_ndjson_rows,
+    'jsonl': iter_ndjson_rows,
+}
+
+
+def iter_upload_rows(upload, file_format=None):
+    """Stream rows from an uploaded CSV or NDJSON file."""
+    if not file_format:
+        file_format = upload.name.rsplit('.', 1)[-1] if '.' in upload.name else ''
+    reader = ROW_READERS.get(file_format.lower())
+    if reader is None:
+        raise ValueError(
+            f'Unsupported file format. Use one of: {", ".join(ROW_READERS)}')
+    upload.open('rb')
+    return reader(upload.file)
+
+
+def issue_certificates(rows, created_by):
+    """
+    Issue certificates for ``rows`` of student_id, course_id, issue_date and
+    expiry_date using one lookup per related model and batched INSERTs.
+    Returns one result dict per input row.
+    """
+    row_serializer = CertificateIssueRowSerializer()
+    results = []
+    valid_rows = []
+    for index, row in enumerate(rows):
+        try:
+            valid_rows.append((index, row_serializer.run_validation(row)))
+            results.append(None)
+        except ValidationError as exc:
+            results.append(
+                {'row': index, 'status': 'error', 'errors': exc.detail})
+
+    students = Student.objects.order_by().in_bulk(
+        {data['student_id'] for _, data in valid_rows})
+    courses = Course.objects.order_by().in_bulk(
+        {data['course_id'] for _, data in valid_rows})
+
+    certificates = []
+    for index, data in valid_rows:
+        student = students.get(data.pop('student_id'))
+        course = courses.get(data.pop('course_id'))
+        errors = {}
+        if student is None:
+            errors['student_id'] = ['Student not found.']
+        if course is None:
+            errors['course_id'] = ['Course not found.']
+        if errors:
+            results[index] = {'row': index, 'status': 'error', 'errors': errors}
+            continue
+        certificate = Certificate(
+            student=student, course=course, created_by=created_by, **data)
+        certificate.prepare_issuance()
+        certificates.append((index, certificate))
+
+    # bulk_create wraps all batches in a single transaction
+    Certificate.objects.bulk_create(
+        [certificate for _, certificate in certificates],
+        batch_size=settings.CERTIFICATE_BULK_BATCH_SIZE,
+    )
+    # bulk_create sends no post_save, so queue the QR renders here
+    enqueue_qr_renders_on_commit(
+        certificate for _, certificate in certificates)
+
+    for index, certificate in certificates:
+        results[index] = {
+            'row': index,
+            'status': 'created',
+            'id': str(certificate.id),
+            'unique_code': certificate.unique_code,
+        }
+    return results
+
+
+# Rejected rows beyond this many are counted but not itemised
+MAX_REPORTED_ERRORS = 100
+
+STUDENT_UPSERT_FIELDS = ['first_name', 'last_name', 'updated_at']
+
+# Only overwritten on existing students when the row gives a value
+STUDENT_OPTIONAL_FIELDS = ['email', 'date_of_birth']
+
+
+def import_students(rows, batch_size=None):
+    """
+    Upsert students from an iterable of rows, keyed on ``student_id``.
+
+    Rows are consumed lazily and written with batched
+    ``bulk_create(update_conflicts=True)``.  Optional columns that a row
+    leaves out or empty keep their stored values.  Returns a dict of
+    inserted, updated, rejected and duplicate counts plus the errors of
+    rejected rows.
+    """
+    batch_size = batch_size or settings.STUDENT_IMPORT_BATCH_SIZE
+    row_serializer = StudentImportRowSerializer()
+    summary = {'inserted': 0, 'updated': 0, 'rejected': 0, 'duplicates': 0,
+               'errors': []}
+
+    def valid_rows():
+        for index, row in enumerate(rows):
+            try:
+                data = row_serializer.run_validation(row)
+            except ValidationError as exc:
+                summary['rejected'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append(
+                        {'row': index, 'errors': exc.detail})
+                continue
+            yield {key: value for key, value in data.items() if value is not None}
+
+    for batch in chunked(valid_rows(), batch_size):
+        # Repeats of a student_id within a batch are merged, later values
+        # winning; a single upsert statement may not touch the same row twice.
+        merged = {}
+        for data in batch:
+            merged.setdefault(data['student_id'], {}).update(data)
+        summary['duplicates'] += len(batch) - len(merged)
+
+        existing = set(Student.objects.order_by().filter(
+            student_id__in=list(merged)
+        ).values_list('student_id', flat=True))
+        # One upsert per set of optional columns given
+        groups = {}
+        for data in merged.values():
+            given = tuple(name for name in STUDENT_OPTIONAL_FIELDS if name in data)
+            groups.setdefault(given, []).append(Student(**data))
+        for given, students in groups.items():
+            Student.objects.bulk_create(
+                students,
+                update_conflicts=True,
+                unique_fields=['student_id'],
+                update_fields=[*STUDENT_UPSERT_FIELDS, *given],
+            )
+        if existing:
+            invalidate_certificates(
+                Certificate.objects.filter(student__student_id__in=existing))
+        summary['updated'] += len(existing)
+        summary['inserted'] += len(merged) - len(existing)
+    return summary
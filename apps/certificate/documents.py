@@ -0,0 +1,155 @@
+"""
+Printable certificate PDFs drawn with Pillow.
+
+Pages are 1-bit A4 landscape images at CERTIFICATE_PDF_DPI.  Fonts and the
+static parts of the page are built once per process and copied for every
+certificate, so batch renders in a process pool only draw the student,
+course and dates and paste the QR code.
+"""
+import itertools
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from .utils import (
+    QR_DATA_FIELDS, build_qr_matrix, chunked, get_qr_data, get_validation_url,
+    imap_bounded, iter_zip, pack_qr_scanlines
+)
+
+# Certificate fields certificate_document() reads, for querysets narrowed with only()
+CERTIFICATE_DOCUMENT_FIELDS = [
+    *QR_DATA_FIELDS, 'issue_date', 'student__student_id',
+    'student__first_name', 'student__last_name', 'course__name',
+]
+
+# A4 landscape
+PAGE_INCHES = (11.69, 8.27)
+
+
+def certificate_document(certificate, validation_url=None):
+    """Return the plain data a certificate PDF is rendered from."""
+    return {
+        'id': str(certificate.id),
+        'student_name': certificate.student.full_name,
+        'student_id': certificate.student.student_id,
+        'course_name': certificate.course.name,
+        'issue_date': certificate.issue_date.isoformat(),
+        'expiry_date': (certificate.expiry_date.isoformat()
+                        if certificate.expiry_date else None),
+        'unique_code': certificate.unique_code,
+        'qr_data': get_qr_data(certificate, validation_url),
+    }
+
+
+@lru_cache(maxsize=32)
+def load_font(size):
+    """Return the configured font at ``size`` pixels, cached per process."""
+    if settings.CERTIFICATE_PDF_FONT:
+        return ImageFont.truetype(settings.CERTIFICATE_PDF_FONT, size)
+    return ImageFont.load_default(size)
+
+
+def _fit_font(text, size, max_width):
+    """Return the largest font up to ``size`` that fits ``text`` in ``max_width``."""
+    while size > 8:
+        font = load_font(size)
+        if font.getlength(text) <= max_width:
+            return font
+        size = size * 9 // 10
+    return load_font(size)
+
+
+@lru_cache(maxsize=4)
+def _page_template(dpi):
+    """Draw the border and fixed wording of the page."""
+    width, height = (int(inches * dpi) for inches in PAGE_INCHES)
+    page = Image.new('1', (width, height), 1)
+    draw = ImageDraw.Draw(page)
+    inset = int(0.35 * dpi)
+    draw.rectangle((inset, inset, width - inset, height - inset),
+                   outline=0, width=max(1, dpi // 40))
+    inset += int(0.1 * dpi)
+    draw.rectangle((inset, inset, width - inset, height - inset),
+                   outline=0, width=max(1, dpi // 150))
+
+    center = width // 2
+    draw.text((center, int(1.5 * dpi)), 'Certificate of Completion',
+              font=load_font(int(0.5 * dpi)), fill=0, anchor='ms')
+    draw.text((center, int(2.5 * dpi)), 'This certifies that',
+              font=load_font(int(0.22 * dpi)), fill=0, anchor='ms')
+    draw.text((center, int(4.3 * dpi)), 'has successfully completed',
+              font=load_font(int(0.22 * dpi)), fill=0, anchor='ms')
+    draw.text((width - int(1.6 * dpi), height - int(0.75 * dpi)), 'Scan to verify',
+              font=load_font(int(0.14 * dpi)), fill=0, anchor='ms')
+    return page
+
+
+def qr_bitmap(qr_data, size):
+    """Render ``qr_data`` as a 1-bit image at most ``size`` pixels wide."""
+    matrix = build_qr_matrix(qr_data)
+    box_size = max(1, size // len(matrix))
+    width, height, rows = pack_qr_scanlines(matrix, box_size)
+    return Image.frombytes('1', (width, height), b''.join(rows))
+
+
+def render_certificate_pdf(document, dpi=None):
+    """Render a certificate document dict as PDF bytes."""
+    dpi = dpi or settings.CERTIFICATE_PDF_DPI
+    page = _page_template(dpi).copy()
+    draw = ImageDraw.Draw(page)
+    width, height = page.size
+    center, text_width = width // 2, width - int(2 * dpi)
+
+    draw.text((center, int(3.5 * dpi)), document['student_name'],
+              font=_fit_font(document['student_name'], int(0.55 * dpi), text_width),
+              fill=0, anchor='ms')
+    draw.text((center, int(5.2 * dpi)), document['course_name'],
+              font=_fit_font(document['course_name'], int(0.38 * dpi), text_width),
+              fill=0, anchor='ms')
+
+    details = [
+        f"Student ID: {document['student_id']}",
+        f"Issued: {document['issue_date']}",
+        f"Expires: {document['expiry_date'] or 'Never'}",
+        f"Certificate code: {document['unique_code']}",
+    ]
+    line_height = int(0.25 * dpi)
+    top = height - int(0.8 * dpi) - line_height * (len(details) - 1)
+    for index, line in enumerate(details):
+        draw.text((int(0.9 * dpi), top + index * line_height), line,
+                  font=load_font(int(0.16 * dpi)), fill=0, anchor='ls')
+
+    qr = qr_bitmap(document['qr_data'], int(1.8 * dpi))
+    page.paste(qr, (width - int(1.6 * dpi) - qr.width // 2,
+                    height - int(0.95 * dpi) - qr.height))
+
+    buffer = BytesIO()
+    page.save(buffer, format='PDF', resolution=dpi,
+              title=f"Certificate {document['unique_code']}")
+    return buffer.getvalue()
+
+
+def render_certificate_pdf_batch(batch):
+    """Render a list of ``(name, document)`` pairs to ``(name, pdf)`` pairs."""
+    return [(name, render_certificate_pdf(document)) for name, document in batch]
+
+
+def iter_certificate_pdf_zip(certificates):
+    """
+    Stream a ZIP of certificate PDFs for ``certificates``.
+    Documents are rendered in batches across a process pool.
+    """
+    validation_url = get_validation_url()
+    entries = (
+        (f'certificate_{certificate.id}.pdf',
+         certificate_document(certificate, validation_url))
+        for certificate in certificates
+    )
+    rendered = imap_bounded(
+        render_certificate_pdf_batch,
+        chunked(entries, settings.CERTIFICATE_PDF_BATCH_SIZE),
+        settings.CERTIFICATE_PDF_WORKERS,
+    )
+    return iter_zip(itertools.chain.from_iterable(rendered))
@@ -0,0 +1,66 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .utils import chunked
+
+# (column name, values() lookup) pairs for flattened certificate exports
+CERTIFICATE_EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('unique_code', 'unique_code'),
+    ('status', 'status'),
+    ('issue_date', 'issue_date'),
+    ('expiry_date', 'expiry_date'),
+    ('student_id', 'student__student_id'),
+    ('student_first_name', 'student__first_name'),
+    ('student_last_name', 'student__last_name'),
+    ('student_email', 'student__email'),
+    ('course_name', 'course__name'),
+    ('created_by_email', 'created_by__email'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+EXPORT_HEADER = [column for column, _ in CERTIFICATE_EXPORT_COLUMNS]
+
+
+class _Echo:
+    """File-like object whose write() returns the written value."""
+
+    def write(self, value):
+        return value
+
+
+def _iter_export_rows(queryset):
+    lookups = [lookup for _, lookup in CERTIFICATE_EXPORT_COLUMNS]
+    return queryset.values_list(*lookups).iterator(
+        chunk_size=settings.CERTIFICATE_EXPORT_CHUNK_SIZE)
+
+
+def _csv_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_certificates_csv(queryset):
+    """Yield the certificates in ``queryset`` as CSV, a chunk of rows at a time."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for rows in chunked(_iter_export_rows(queryset), 500):
+        yield ''.join(
+            writer.writerow([_csv_value(value) for value in row])
+            for row in rows
+        )
+
+
+def iter_certificates_ndjson(queryset):
+    """Yield the certificates in ``queryset`` as NDJSON, a chunk of rows at a time."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for rows in chunked(_iter_export_rows(queryset), 500):
+        yield ''.join(
+            encoder.encode(dict(zip(EXPORT_HEADER, row))) + '\n'
+            for row in rows
+        )
@@ -0,0 +1,116 @@
+"""
+Database-backed queue that pre-renders each certificate's default QR image.
+
+Saving a certificate whose QR payload no longer matches its stored image
+queues a ``QRRenderJob`` once the transaction commits.  The
+``render_qr_images`` command claims pending jobs, renders the PNG and
+stores it through the default storage, so the ``qr-code`` action can serve
+the file instead of rendering inside the request.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Certificate, QRRenderJob
+from .utils import QR_DATA_FIELDS, get_qr_code_key, render_qr_code
+
+JOB_RESET_FIELDS = ['status', 'attempts', 'error', 'queued_at', 'updated_at']
+
+
+def has_stored_qr_image(certificate, key=None):
+    """Return True if the stored image is the default render for ``key``."""
+    if not certificate.qr_image:
+        return False
+    if key is None:
+        key = get_qr_code_key(certificate)[0]
+    return certificate.qr_image_key == key
+
+
+def enqueue_qr_renders(certificates):
+    """Queue renders for certificates whose stored image is missing or stale."""
+    now = timezone.now()
+    jobs = [
+        QRRenderJob(certificate_id=certificate.id, queued_at=now)
+        for certificate in certificates
+        if not has_stored_qr_image(certificate)
+    ]
+    # A certificate has one job row, which is reset to pending on re-queue
+    QRRenderJob.objects.bulk_create(
+        jobs,
+        update_conflicts=True,
+        unique_fields=['certificate'],
+        update_fields=JOB_RESET_FIELDS,
+    )
+    return len(jobs)
+
+
+def enqueue_qr_renders_on_commit(certificates):
+    certificates = list(certificates)
+    transaction.on_commit(lambda: enqueue_qr_renders(certificates))
+
+
+def claim_qr_render_jobs(batch_size):
+    """
+    Mark up to ``batch_size`` pending jobs as running and return their ids.
+    Jobs left running longer than QR_RENDER_JOB_TIMEOUT by a worker that
+    died are claimed again.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.QR_RENDER_JOB_TIMEOUT)
+    with transaction.atomic():
+        ids = list(
+            QRRenderJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending') | Q(status='running', updated_at__lt=stale))
+            .order_by('queued_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        QRRenderJob.objects.filter(id__in=ids).update(
+            status='running', attempts=F('attempts') + 1,
+            updated_at=timezone.now())
+    return ids
+
+
+def run_qr_render_job(job):
+    """Render and store the QR image for a claimed job."""
+    certificate = Certificate.objects.only(
+        *QR_DATA_FIELDS, 'qr_image', 'qr_image_key').get(id=job.certificate_id)
+    key, qr_data, params = get_qr_code_key(certificate)
+    if certificate.qr_image_key == key and certificate.qr_image:
+        return
+    # Names carry the render key, so a file being served is never
+    # overwritten and its URL changes whenever the image does
+    previous = certificate.qr_image
+    storage = previous.storage
+    name = storage.save(
+        f'qrcodes/{certificate.id}-{key[:16]}.png',
+        ContentFile(render_qr_code(qr_data, **params)))
+    # update() leaves post_save alone, so storing the image does not
+    # re-queue the job or invalidate cached validation results
+    Certificate.objects.filter(id=certificate.id).update(
+        qr_image=name, qr_image_key=key)
+    if previous and previous.name != name:
+        storage.delete(previous.name)
+
+
+def process_qr_render_jobs(batch_size=None):
+    """Claim and run one batch of jobs, returning ``(done, failed)``."""
+    batch_size = batch_size or settings.QR_RENDER_JOB_BATCH_SIZE
+    done = failed = 0
+    for job in QRRenderJob.objects.filter(id__in=claim_qr_render_jobs(batch_size)):
+        try:
+            run_qr_render_job(job)
+        except Exception as exc:
+            retry = job.attempts < settings.QR_RENDER_JOB_MAX_ATTEMPTS
+            QRRenderJob.objects.filter(id=job.id, status='running').update(
+                status='pending' if retry else 'failed',
+                error=str(exc), updated_at=timezone.now())
+            failed += 1
+            continue
+        # A job re-queued while it ran stays pending and renders again
+        QRRenderJob.objects.filter(id=job.id, status='running').update(
+            status='done', error='', updated_at=timezone.now())
+        done += 1
+    return done, failed
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ...revocation import build_revocation_list
+
+
+class Command(BaseCommand):
+    help = 'Publish a versioned revocation snapshot and delta for offline validators'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Publish a new version even if nothing changed')
+        parser.add_argument(
+            '--keep-deltas', type=int, default=None,
+            help='Number of delta files to retain')
+
+    def handle(self, *args, force, keep_deltas, **options):
+        manifest = build_revocation_list(force=force, keep_deltas=keep_deltas)
+        self.stdout.write(self.style.SUCCESS(
+            f"Revocation list version {manifest['version']}: "
+            f"{manifest['count']} revoked or expired certificates"
+        ))
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...bulk import ROW_READERS, import_students
+
+
+class Command(BaseCommand):
+    help = 'Upsert students on student_id from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='File to import, or "-" to read from stdin')
+        parser.add_argument(
+            '--format', dest='file_format', choices=sorted(ROW_READERS),
+            help='File format (defaults to the file extension)')
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Rows per upsert statement')
+
+    def handle(self, *args, path, file_format, batch_size, **options):
+        if not file_format:
+            file_format = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+        reader = ROW_READERS.get(file_format)
+        if reader is None:
+            raise CommandError('Cannot tell the file format; pass --format')
+
+        if path == '-':
+            summary = import_students(reader(sys.stdin.buffer), batch_size)
+        else:
+            try:
+                with open(path, 'rb') as fileobj:
+                    summary = import_students(reader(fileobj), batch_size)
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {summary['inserted']}, updated {summary['updated']}, "
+            f"rejected {summary['rejected']} students; "
+            f"merged {summary['duplicates']} repeated rows"
+        ))
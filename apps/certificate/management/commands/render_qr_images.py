@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...jobs import enqueue_qr_renders, process_qr_render_jobs
+from ...models import Certificate
+from ...utils import QR_DATA_FIELDS, chunked
+
+
+class Command(BaseCommand):
+    help = 'Render and store queued certificate QR images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty instead of polling')
+        parser.add_argument(
+            '--enqueue-stale', action='store_true',
+            help='First queue every certificate whose stored image is missing '
+                 'or out of date, e.g. after BASE_URL changes')
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.QR_RENDER_JOB_BATCH_SIZE,
+            help='Jobs claimed per batch')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, once, enqueue_stale, batch_size, poll_interval, **options):
+        if enqueue_stale:
+            certificates = Certificate.objects.order_by().only(
+                *QR_DATA_FIELDS, 'qr_image', 'qr_image_key'
+            ).iterator(chunk_size=2000)
+            queued = sum(
+                enqueue_qr_renders(batch) for batch in chunked(certificates, 2000))
+            self.stdout.write(f'Queued {queued} QR renders')
+
+        done = failed = 0
+        while True:
+            batch_done, batch_failed = process_qr_render_jobs(batch_size)
+            done += batch_done
+            failed += batch_failed
+            if batch_done or batch_failed:
+                continue
+            if once:
+                break
+            time.sleep(poll_interval)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {done} QR images, {failed} failed'))
@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ...models import Certificate, compute_signature
+from ...utils import imap_bounded
+
+SIGNATURE_COLUMNS = [
+    'id', 'unique_code', 'signature', 'issue_date', 'expiry_date',
+    'created_by_id', 'created_at', 'student__student_id',
+    'student__first_name', 'student__last_name', 'course__name',
+]
+
+REPORT_HEADER = ['certificate_id', 'unique_code', 'created_at', 'problem']
+
+
+def check_chunk(rows):
+    """
+    Recompute signatures for a chunk of values() rows.
+    Returns the chunk's last key, its size and the rows that fail.
+    """
+    failures = []
+    for row in rows:
+        if not row['signature']:
+            failures.append((row, 'missing'))
+            continue
+        expected = compute_signature(
+            certificate_id=row['id'],
+            student_id=row['student__student_id'],
+            student_name=f"{row['student__first_name']} {row['student__last_name']}",
+            course_name=row['course__name'],
+            issue_date=row['issue_date'],
+            expiry_date=row['expiry_date'],
+            unique_code=row['unique_code'],
+            created_by_id=row['created_by_id'],
+            created_at=row['created_at'],
+        )
+        if expected != row['signature']:
+            failures.append((row, 'mismatch'))
+    last = rows[-1]
+    return (last['created_at'], last['id']), len(rows), [
+        [str(row['id']), row['unique_code'], row['created_at'].isoformat(), problem]
+        for row, problem in failures
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Recompute certificate signatures and report missing or tampered rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', help='Only check certificates created on or after this date/datetime')
+        parser.add_argument(
+            '--status', choices=[choice for choice, _ in Certificate.STATUS_CHOICES],
+            help='Only check certificates with this status')
+        parser.add_argument(
+            '--report', default='signature_report.csv',
+            help='CSV file that failures are appended to')
+        parser.add_argument(
+            '--checkpoint',
+            help='JSON file recording progress; an existing checkpoint is resumed')
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.SIGNATURE_AUDIT_CHUNK_SIZE,
+            help='Certificates fetched and checked per task')
+        parser.add_argument(
+            '--workers', type=int, default=settings.SIGNATURE_AUDIT_WORKERS,
+            help='Worker processes recomputing signatures')
+
+    def handle(self, *args, **options):
+        queryset = Certificate.objects.all()
+        if options['since']:
+            queryset = queryset.filter(created_at__gte=self.parse_since(options['since']))
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        checkpoint = self.load_checkpoint(options['checkpoint'])
+        checked, failed = checkpoint['checked'], checkpoint['failed']
+        chunks = self.iter_chunks(queryset, checkpoint['key'], options['chunk_size'])
+
+        new_report = not (checkpoint['key'] and os.path.exists(options['report']))
+        with open(options['report'], 'w' if new_report else 'a', newline='') as report:
+            writer = csv.writer(report)
+            if new_report:
+                writer.writerow(REPORT_HEADER)
+            for key, count, failures in imap_bounded(
+                    check_chunk, chunks, options['workers']):
+                writer.writerows(failures)
+                report.flush()
+                checked += count
+                failed += len(failures)
+                self.save_checkpoint(options['checkpoint'], key, checked, failed)
+
+        if options['checkpoint'] and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+
+        message = f'Checked {checked} certificates, {failed} failed verification'
+        if failed:
+            raise CommandError(f"{message}; see {options['report']}")
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def iter_chunks(self, queryset, key, chunk_size):
+        """Fetch rows in (created_at, id) keyset order, one chunk per query."""
+        queryset = queryset.order_by('created_at', 'id').values(*SIGNATURE_COLUMNS)
+        while True:
+            page = queryset
+            if key is not None:
+                created_at, pk = key
+                page = page.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            rows = list(page[:chunk_size])
+            if not rows:
+                return
+            yield rows
+            key = (rows[-1]['created_at'], rows[-1]['id'])
+
+    def parse_since(self, value):
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f'Invalid --since value: {value}')
+            since = datetime.combine(day, time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def load_checkpoint(self, path):
+        state = {'key': None, 'checked': 0, 'failed': 0}
+        if path and os.path.exists(path):
+            with open(path) as fileobj:
+                saved = json.load(fileobj)
+            state.update(
+                key=(datetime.fromisoformat(saved['created_at']), saved['id']),
+                checked=saved['checked'],
+                failed=saved['failed'],
+            )
+            self.stdout.write(f"Resuming after {saved['checked']} certificates")
+        return state
+
+    def save_checkpoint(self, path, key, checked, failed):
+        if not path:
+            return
+        created_at, pk = key
+        with open(f'{path}.tmp', 'w') as fileobj:
+            json.dump({
+                'created_at': created_at.isoformat(),
+                'id': str(pk),
+                'checked': checked,
+                'failed': failed,
+            }, fileobj)
+        os.replace(f'{path}.tmp', path)
@@ -0,0 +1,83 @@
+"""
+Negotiated response compression.
+
+Text responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are sent
+brotli-compressed when the client accepts ``br`` and the brotli package is
+installed, and gzip-compressed otherwise.  Images, PDFs and ZIPs are already
+compressed and are passed through.
+
+Brotli output cannot be padded the way GZipMiddleware pads gzip against
+BREACH, so brotli is limited to API types in BROTLI_TYPES on responses
+that set no cookies; HTML pages, which carry CSRF tokens, get gzip.
+"""
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .negotiation import parse_qualities
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+}
+
+BROTLI_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'image/svg+xml',
+}
+
+
+def accepted_encodings(header):
+    """Return the content codings an Accept-Encoding ``header`` allows."""
+    return {coding for coding, quality in parse_qualities(header).items() if quality > 0}
+
+
+def _content_type(response):
+    return response.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def is_compressible(response):
+    content_type = _content_type(response)
+    return content_type.startswith('text/') or content_type in COMPRESSIBLE_TYPES
+
+
+def is_brotli_safe(response):
+    return _content_type(response) in BROTLI_TYPES and not response.cookies
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware with a size threshold, a content type check and brotli.
+    Streamed responses, such as exports, are gzipped on the fly.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if (brotli is not None and 'br' in encodings and not response.streaming
+                and is_brotli_safe(response)):
+            patch_vary_headers(response, ('Accept-Encoding',))
+            compressed = brotli.compress(
+                response.content, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+            etag = response.get('ETag')
+            if etag and etag.startswith('"'):
+                response.headers['ETag'] = 'W/' + etag
+            response.headers['Content-Encoding'] = 'br'
+            return response
+        if 'gzip' not in encodings:
+            patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return super().process_response(request, response)
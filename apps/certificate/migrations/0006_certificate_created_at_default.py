@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0005_alter_certificate_course'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
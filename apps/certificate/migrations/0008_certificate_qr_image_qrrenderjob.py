@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0007_name_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='qr_image',
+            field=models.FileField(blank=True, editable=False, upload_to='qrcodes/'),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='qr_image_key',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='QRRenderJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('queued_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('certificate', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='qr_render_job', to='certificate.certificate')),
+            ],
+            options={
+                'ordering': ['queued_at'],
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='certificate_status_54b2f0_idx')],
+            },
+        ),
+    ]
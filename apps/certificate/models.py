@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 import uuid
 import hashlib
 import json
@@ -17,6 +18,34 @@ def validate_certificate_status(value):
             f'Status must be one of: {", ".join(valid_statuses)}')
 
 
+def compute_signature(certificate_id, student_id, student_name, course_name,
+                      issue_date, expiry_date, unique_code, created_by_id,
+                      created_at):
+    """
+    Compute a certificate signature from plain values, so rows fetched with
+    values() can be checked without loading model instances.
+    """
+    # Create a dictionary of certificate data
+    cert_data = {
+        'certificate_id': str(certificate_id),
+        'student_id': student_id,
+        'student_name': student_name,
+        'course_name': course_name,
+        'issue_date': issue_date.isoformat(),
+        'expiry_date': expiry_date.isoformat() if expiry_date else None,
+        'unique_code': unique_code,
+        'created_by': str(created_by_id) if created_by_id else None,
+        'created_at': created_at.isoformat() if created_at else None,
+    }
+
+    # Convert to JSON string and encode
+    data_string = json.dumps(cert_data, sort_keys=True)
+    data_bytes = data_string.encode('utf-8')
+
+    # Generate SHA-256 hash
+    return hashlib.sha256(data_bytes).hexdigest()
+
+
 class Student(models.Model):
     """Model representing a student who can receive certificates."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -76,8 +105,14 @@ class Certificate(models.Model):
         null=True,
         related_name='created_certificates'
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set on instantiation rather than on INSERT so the signature, which
+    # covers created_at, can be computed before the row is written.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
+    # Pre-rendered default QR image and the render key it was made for,
+    # written by the render_qr_images worker
+    qr_image = models.FileField(upload_to='qrcodes/', blank=True, editable=False)
+    qr_image_key = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
@@ -93,36 +128,32 @@ class Certificate(models.Model):
 
     def generate_signature(self):
         """Generate a digital signature for the certificate."""
-        # Create a dictionary of certificate data
-        cert_data = {
-            'certificate_id': str(self.id),
-            'student_id': self.student.student_id,
-            'student_name': self.student.full_name,
-            'course_name': self.course.name,
-            'issue_date': self.issue_date.isoformat(),
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None,
-            'unique_code': self.unique_code,
-            'created_by': str(self.created_by.id) if self.created_by else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-        }
-
-        # Convert to JSON string and encode
-        data_string = json.dumps(cert_data, sort_keys=True)
-        data_bytes = data_string.encode('utf-8')
-
-        # Generate SHA-256 hash
-        signature = hashlib.sha256(data_bytes).hexdigest()
-        return signature
-
-    def save(self, *args, **kwargs):
+        return compute_signature(
+            certificate_id=self.id,
+            student_id=self.student.student_id,
+            student_name=self.student.full_name,
+            course_name=self.course.name,
+            issue_date=self.issue_date,
+            expiry_date=self.expiry_date,
+            unique_code=self.unique_code,
+            created_by_id=self.created_by_id,
+            created_at=self.created_at,
+        )
+
+    def prepare_issuance(self):
+        """Fill in unique_code and signature ahead of the row being written."""
         if not self.unique_code:
             self.unique_code = str(uuid.uuid4())
-        # Generate signature after saving to ensure created_at is available
-        super().save(*args, **kwargs)
         if not self.signature:
             self.signature = self.generate_signature()
-            # Save again to update the signature
-            super().save(update_fields=['signature'])
+
+    def save(self, *args, **kwargs):
+        # Sign before writing so a new certificate costs a single INSERT
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not self.signature:
+            kwargs['update_fields'] = {*update_fields, 'signature'}
+        self.prepare_issuance()
+        super().save(*args, **kwargs)
 
     def verify_signature(self):
         """Verify the certificate's digital signature."""
@@ -147,3 +178,31 @@ class Course(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class QRRenderJob(models.Model):
+    """Queued render of a certificate's stored QR image."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    certificate = models.OneToOneField(
+        Certificate, on_delete=models.CASCADE, related_name='qr_render_job')
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    queued_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['queued_at']
+        indexes = [
+            models.Index(fields=['status', 'queued_at']),
+        ]
+
+    def __str__(self):
+        return f"QR render for {self.certificate_id} ({self.status})"
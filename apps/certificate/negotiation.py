@@ -0,0 +1,65 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+def parse_qualities(header):
+    """
+    Return ``{value: q}`` for an Accept or Accept-Encoding ``header``;
+    unparsable q-values count as 0.
+    """
+    qualities = {}
+    for item in header.split(','):
+        value, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, q = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(q)
+                except ValueError:
+                    quality = 0.0
+        if value.strip():
+            qualities[value.strip().lower()] = quality
+    return qualities
+
+
+def media_type_quality(qualities, media_type):
+    """Return the q-value of the most specific range matching ``media_type``."""
+    for media_range in (media_type, media_type.split('/')[0] + '/*', '*/*'):
+        if media_range in qualities:
+            return qualities[media_range]
+    return 0.0
+
+
+def preferred_format(header, media_types):
+    """
+    Return the format of ``media_types`` (``{format: media_type}``, default
+    first) that an Accept ``header`` prefers.
+
+    A default accepted only through ``image/*`` or ``*/*`` is kept, as
+    browsers send those next to image/webp or image/avif on every request.
+    Otherwise q-values decide, ties and clients accepting none of the types
+    getting the default.
+    """
+    qualities = parse_qualities(header)
+    default = next(iter(media_types))
+    if (media_types[default] not in qualities
+            and media_type_quality(qualities, media_types[default]) > 0):
+        return default
+    return max(media_types, key=lambda name: media_type_quality(qualities, media_types[name]))
+
+
+class PreferredFormatNegotiation(DefaultContentNegotiation):
+    """
+    Negotiation for actions with alternative renderings of one resource,
+    like QR images: ``?format=`` selects a renderer as usual, and Accept
+    picks one with preferred_format(), falling back to the first renderer
+    instead of answering 406.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if format_suffix or request.query_params.get(self.settings.URL_FORMAT_OVERRIDE):
+            return super().select_renderer(request, renderers, format_suffix)
+        media_types = {renderer.format: renderer.media_type for renderer in renderers}
+        renderer_format = preferred_format(request.headers.get('Accept', ''), media_types)
+        renderer = next(renderer for renderer in renderers if renderer.format == renderer_format)
+        return renderer, renderer.media_type
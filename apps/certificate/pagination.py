@@ -0,0 +1,168 @@
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination, CursorPagination, PageNumberPagination, _reverse_ordering
+)
+
+
+def _is_nullable(model, lookup):
+    """Return True if any field along ``lookup`` may be NULL."""
+    for name in lookup.split(LOOKUP_SEP):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return True
+        if field.null:
+            return True
+        model = field.related_model
+    return False
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on ``(ordering field, id)``.
+
+    Pages are fetched with a ``WHERE (field, id) < (value, id)`` style filter
+    instead of an OFFSET, so deep pages cost the same as the first one.  The
+    ordering field follows ``OrderingFilter``; nullable fields cannot be
+    used as keys and fall back to the default ``-created_at`` ordering.
+    """
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        field = ordering[0]
+        if _is_nullable(queryset.model, field.lstrip('-')):
+            field = self.ordering[0]
+        return (field, '-id' if field.startswith('-') else 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = self._select_key_columns(queryset).order_by(*ordering)
+        # Fetch one extra row to tell whether another page follows.  A crafted
+        # cursor value fails in filter() or in the query.
+        try:
+            if current_position is not None:
+                queryset = queryset.filter(
+                    self._get_keyset_filter(ordering, current_position))
+            results = list(queryset[:self.page_size + 1])
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if has_following_position else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following_position
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _select_key_columns(self, queryset):
+        """
+        Add the key columns to a values() queryset, such as one narrowed by
+        ``?fields=``, that leaves them out.  Row serializers only output the
+        columns they asked for, so the extra ones are not returned.
+        """
+        columns = queryset._fields
+        if not columns:
+            # Model instances, or values() of every concrete field
+            return queryset
+        missing = [column for column in (self.ordering[0].lstrip('-'), 'id')
+                   if column not in columns]
+        return queryset.values(*columns, *missing) if missing else queryset
+
+    def _get_keyset_filter(self, ordering, position):
+        try:
+            value, pk = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        field = ordering[0].lstrip('-')
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        return (
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'id__{lookup}': pk})
+        )
+
+    def _get_position_from_instance(self, instance, ordering):
+        field = ordering[0].lstrip('-')
+        if isinstance(instance, dict):
+            value, pk = instance[field], instance['id']
+        else:
+            value = instance
+            for name in field.split(LOOKUP_SEP):
+                value = getattr(value, name)
+            pk = instance.id
+        return json.dumps([str(value), str(pk)])
+
+
+class SelectablePagination(BasePagination):
+    """
+    Page-number pagination by default; keyset cursor pagination when the
+    client asks for it with ``?pagination=cursor`` or sends a ``cursor``.
+    """
+    pagination_query_param = 'pagination'
+
+    def __init__(self):
+        self.page_number = PageNumberPagination()
+        self.keyset = KeysetCursorPagination()
+        self.active = self.page_number
+
+    @property
+    def display_page_controls(self):
+        return self.active.display_page_controls
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.pagination_query_param) == 'cursor'
+                or self.keyset.cursor_query_param in request.query_params):
+            self.active = self.keyset
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.active.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.pagination_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" for keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            *self.page_number.get_schema_operation_parameters(view),
+            *self.keyset.get_schema_operation_parameters(view),
+        ]
@@ -0,0 +1,85 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib encoder is used instead
+    orjson = None
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson, which handles UUIDs, dates and
+    datetimes natively; Decimals and other types fall back to DRF's encoder.
+    Indented output, as requested by the browsable API, data orjson cannot
+    encode, such as integers wider than 64 bits, and installs without
+    orjson use the stdlib encoder.
+    """
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z if orjson else 0
+    _default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=self._default, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer too, as they end lines in JavaScript
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Renderer for actions that build their own response body.
+
+    It only lets content negotiation (``?format=`` or ``Accept``) select the
+    media type.  Errors raised before the action runs still carry a data
+    dict, which is rendered as JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return FastJSONRenderer().render(data)
+
+
+class CSVRenderer(PassthroughRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(PassthroughRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class PNGRenderer(PassthroughRenderer):
+    media_type = 'image/png'
+    format = 'png'
+
+
+class SVGRenderer(PassthroughRenderer):
+    media_type = 'image/svg+xml'
+    format = 'svg'
+
+
+class WebPRenderer(PassthroughRenderer):
+    media_type = 'image/webp'
+    format = 'webp'
+
+
+class PDFRenderer(PassthroughRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+class ZIPRenderer(PassthroughRenderer):
+    media_type = 'application/zip'
+    format = 'zip'
@@ -0,0 +1,225 @@
+"""
+Revocation snapshots for offline validators.
+
+A snapshot is the sorted list of revoked or expired certificates, each
+identified by the first 16 bytes of the SHA-256 of its unique code::
+
+    b'CRL1' | version u32 | count u32 | generated_at u64 | count * 16 bytes
+
+Every build that changes the list also writes a delta from the previous
+version, so validators at version N only download what changed::
+
+    b'CRD1' | from u32 | to u32 | added u32 | removed u32 | entries...
+
+``manifest.json`` names the current snapshot and the retained deltas by
+their download names; a validator older than the oldest retained delta
+downloads the snapshot again.  All numbers are big-endian.
+
+Snapshots and deltas are never overwritten once published.  A build writes
+them before it replaces the manifest, and files the new manifest no longer
+names are listed under ``retired`` and deleted by the next build, so
+validators that read the previous manifest can still download them.
+"""
+import bisect
+import hashlib
+import json
+import os
+import re
+import struct
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Certificate
+
+ENTRY_SIZE = 16
+SNAPSHOT_HEADER = struct.Struct('>4sIIQ')
+DELTA_HEADER = struct.Struct('>4sIIII')
+MANIFEST_NAME = 'manifest.json'
+PUBLISHED_NAME = re.compile(r'manifest\.json|snapshot-\d+\.bin|delta-\d+-\d+\.bin')
+
+
+def revocation_entry(unique_code):
+    return hashlib.sha256(unique_code.encode('utf-8')).digest()[:ENTRY_SIZE]
+
+
+def _join(entries):
+    return b''.join(entries)
+
+
+def _split(data):
+    return [data[i:i + ENTRY_SIZE] for i in range(0, len(data), ENTRY_SIZE)]
+
+
+def encode_snapshot(version, entries, generated_at):
+    return SNAPSHOT_HEADER.pack(b'CRL1', version, len(entries), generated_at) + _join(entries)
+
+
+def decode_snapshot(data):
+    """Return ``(version, sorted entries)`` from snapshot bytes."""
+    magic, version, count, _ = SNAPSHOT_HEADER.unpack_from(data)
+    if magic != b'CRL1':
+        raise ValueError('Not a revocation snapshot')
+    entries = _split(data[SNAPSHOT_HEADER.size:])
+    if len(entries) != count:
+        raise ValueError('Truncated revocation snapshot')
+    return version, entries
+
+
+def encode_delta(from_version, to_version, added, removed):
+    header = DELTA_HEADER.pack(
+        b'CRD1', from_version, to_version, len(added), len(removed))
+    return header + _join(added) + _join(removed)
+
+
+def decode_delta(data):
+    """Return ``(from_version, to_version, added, removed)`` from delta bytes."""
+    magic, from_version, to_version, added, removed = DELTA_HEADER.unpack_from(data)
+    if magic != b'CRD1':
+        raise ValueError('Not a revocation delta')
+    entries = _split(data[DELTA_HEADER.size:])
+    return from_version, to_version, entries[:added], entries[added:added + removed]
+
+
+def apply_delta(entries, delta):
+    """Apply delta bytes to a sorted entry list and return the new list."""
+    _, _, added, removed = decode_delta(delta)
+    return sorted(set(entries).difference(removed).union(added))
+
+
+def is_revoked(entries, unique_code):
+    """Binary-search a sorted entry list for ``unique_code``."""
+    entry = revocation_entry(unique_code)
+    index = bisect.bisect_left(entries, entry)
+    return index < len(entries) and entries[index] == entry
+
+
+def collect_revoked_entries(today=None):
+    """Return sorted entries for every revoked or expired certificate."""
+    today = today or timezone.localdate()
+    codes = Certificate.objects.filter(
+        Q(status__in=['revoked', 'expired']) | Q(expiry_date__lt=today)
+    ).order_by().values_list('unique_code', flat=True)
+    return sorted({revocation_entry(code) for code in codes.iterator(chunk_size=10000)})
+
+
+def _path(name):
+    return f'{settings.REVOCATION_LIST_PATH}/{name}'
+
+
+def _published_name(name):
+    """Download name of a manifest entry; older builds wrote storage paths."""
+    return name.rsplit('/', 1)[-1]
+
+
+def _stored_path(name):
+    return _path(_published_name(name))
+
+
+def revocation_file_path(name):
+    """Return the storage path of a published file, or None for other names."""
+    if PUBLISHED_NAME.fullmatch(name):
+        return _path(name)
+    return None
+
+
+def load_manifest(storage=default_storage):
+    if not storage.exists(_path(MANIFEST_NAME)):
+        return None
+    with storage.open(_path(MANIFEST_NAME), 'rb') as fileobj:
+        return json.load(fileobj)
+
+
+def _save(storage, name, content):
+    """Write a snapshot or delta; an existing file was never published."""
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def _replace(storage, name, content):
+    """Replace ``name`` so that readers see either the old or the new file."""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote storages that overwrite in place do so in one upload
+        if storage.get_available_name(name) != name:
+            storage.delete(name)
+        storage.save(name, ContentFile(content))
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fileobj:
+            fileobj.write(content)
+        os.chmod(temp_path, storage.file_permissions_mode or 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def build_revocation_list(storage=default_storage, force=False, keep_deltas=None):
+    """
+    Publish a new snapshot version plus the delta from the previous one.
+    Returns the manifest, which is unchanged if nothing was revoked or
+    restored since the last build (unless ``force``).
+    """
+    keep_deltas = settings.REVOCATION_DELTAS_KEPT if keep_deltas is None else keep_deltas
+    manifest = load_manifest(storage)
+    entries = collect_revoked_entries()
+
+    previous = []
+    if manifest is not None:
+        with storage.open(_stored_path(manifest['snapshot']), 'rb') as fileobj:
+            _, previous = decode_snapshot(fileobj.read())
+        # Manifests still naming storage paths are rewritten
+        if (previous == entries and not force
+                and manifest['snapshot'] == _published_name(manifest['snapshot'])):
+            return manifest
+
+    version = manifest['version'] + 1 if manifest else 1
+    generated_at = timezone.now()
+    snapshot = encode_snapshot(version, entries, int(generated_at.timestamp()))
+    snapshot_name = f'snapshot-{version}.bin'
+    _save(storage, _path(snapshot_name), snapshot)
+
+    deltas = [{**delta, 'file': _published_name(delta['file'])}
+              for delta in manifest['deltas']] if manifest else []
+    retired = []
+    if manifest is not None:
+        previous_set, current_set = set(previous), set(entries)
+        delta_name = f'delta-{version - 1}-{version}.bin'
+        added = sorted(current_set - previous_set)
+        removed = sorted(previous_set - current_set)
+        _save(storage, _path(delta_name), encode_delta(version - 1, version, added, removed))
+        deltas.append({
+            'from': version - 1, 'to': version, 'file': delta_name,
+            'added': len(added), 'removed': len(removed),
+        })
+        retired.append(_published_name(manifest['snapshot']))
+    stale = deltas[:-keep_deltas] if keep_deltas else deltas
+    retired.extend(delta['file'] for delta in stale)
+    deltas = deltas[len(stale):]
+
+    new_manifest = {
+        'version': version,
+        'generated_at': generated_at.isoformat(),
+        'count': len(entries),
+        'entry_size': ENTRY_SIZE,
+        'snapshot': snapshot_name,
+        'sha256': hashlib.sha256(snapshot).hexdigest(),
+        'deltas': deltas,
+        'retired': retired,
+    }
+    _replace(storage, _path(MANIFEST_NAME),
+             json.dumps(new_manifest, indent=2).encode('utf-8'))
+    # Retired by the previous build, so no published manifest names them now
+    for name in manifest.get('retired', []) if manifest else []:
+        storage.delete(_stored_path(name))
+    return new_manifest
@@ -0,0 +1,236 @@
+"""
+Fast read path: serializer-shaped dicts built straight from values() rows.
+
+A ValuesSerializer is compiled once from a ModelSerializer class.  Each
+readable field becomes a values() column plus a converter that matches the
+DRF field's ``to_representation``, and nested serializers are flattened
+into ``relation__field`` columns.  List and retrieve responses then skip
+model instances and per-row field binding while keeping the same JSON.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from .serializers import CertificateSerializer, CourseSerializer, StudentSerializer
+
+
+def _current_timezone():
+    """Return the timezone datetimes are output in, or None without USE_TZ."""
+    # Looked up once per call rather than per value: it is a context-local read
+    return timezone.get_current_timezone() if settings.USE_TZ else None
+
+
+def _identity(value, tz):
+    return value
+
+
+def _iso_datetime(value, tz):
+    if tz is not None and value.tzinfo is not None:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def _iso_date(value, tz):
+    return value.isoformat()
+
+
+def _is_iso(field, default):
+    return str(getattr(field, 'format', default)).lower() == 'iso-8601'
+
+
+def _str(value, tz):
+    return str(value)
+
+
+def _converter(field):
+    """
+    Return a fast equivalent of ``field.to_representation`` taking the value
+    and the current timezone.
+    """
+    if isinstance(field, serializers.DateTimeField):
+        if _is_iso(field, api_settings.DATETIME_FORMAT):
+            return _iso_datetime
+    elif isinstance(field, serializers.DateField):
+        if _is_iso(field, api_settings.DATE_FORMAT):
+            return _iso_date
+    elif isinstance(field, serializers.UUIDField):
+        if field.uuid_format == 'hex_verbose':
+            return _str
+    elif isinstance(field, (serializers.CharField, serializers.IntegerField,
+                            serializers.ChoiceField, serializers.BooleanField,
+                            serializers.ReadOnlyField)):
+        # Database values already have the type these fields output
+        return _identity
+    return lambda value, tz: field.to_representation(value)
+
+
+class ValuesSerializer:
+    """
+    Serializer output for ``values(*columns)`` rows.
+
+    ``computed`` maps serializer classes to fields that are not model
+    columns, such as properties, as ``{name: (columns, function)}``; the
+    function receives the column values in order.
+
+    ``fields`` limits the output to those top-level fields, and ``expand``
+    to the nested serializers rendered in full; the others are rendered as
+    the related primary key.  Columns, and so joins, are only selected for
+    what is output.
+    """
+
+    def __init__(self, serializer_class, computed=None, prefix='',
+                 fields=None, expand=None):
+        self.serializer_class = serializer_class
+        self.computed = computed
+        self.model = serializer_class.Meta.model
+        self.prefix = prefix
+        self.columns = []
+        self._plan = []
+        self._guards = []
+        own_computed = (computed or {}).get(serializer_class, {})
+        readable = {name: field for name, field in serializer_class().fields.items()
+                    if not field.write_only}
+        self.field_names = frozenset(readable)
+        self.expandable = frozenset(
+            name for name, field in readable.items()
+            if isinstance(field, serializers.BaseSerializer))
+        for name, field in readable.items():
+            if fields is not None and name not in fields:
+                continue
+            if name in own_computed:
+                self._compile_computed(name, *own_computed[name])
+            elif name in self.expandable:
+                if expand is None or name in expand:
+                    self._compile_nested(name, field, computed)
+                else:
+                    self._compile_related_pk(name, field)
+            else:
+                self._compile_field(name, field)
+
+    def _column(self, column):
+        column = self.prefix + column
+        if column not in self.columns:
+            self.columns.append(column)
+        return column
+
+    def _resolve(self, source_attrs, relations):
+        """
+        Check that ``source_attrs`` names model fields and return the path
+        of the first nullable relation among its first ``relations`` steps.
+        """
+        model, nullable = self.model, None
+        for index, name in enumerate(source_attrs):
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f'{self.model.__name__}.{".".join(source_attrs)} is not a '
+                    f'model field; pass it in computed')
+            if index < relations and field.null and nullable is None:
+                nullable = LOOKUP_SEP.join(source_attrs[:index + 1])
+            model = field.related_model
+        return nullable
+
+    def _compile_computed(self, name, columns, function):
+        columns = [self._column(column) for column in columns]
+        self._plan.append(
+            (name, lambda row, tz: function(*[row[column] for column in columns])))
+
+    def _compile_nested(self, name, field, computed):
+        if isinstance(field, serializers.ListSerializer):
+            raise ImproperlyConfigured(f'Nested many=True field {name} is not supported')
+        source_attrs = field.source_attrs
+        nullable = self._resolve(source_attrs, len(source_attrs))
+        nested = ValuesSerializer(
+            type(field), computed,
+            prefix=self.prefix + LOOKUP_SEP.join(source_attrs) + LOOKUP_SEP)
+        self.columns.extend(
+            column for column in nested.columns if column not in self.columns)
+        if nullable is None:
+            self._plan.append((name, nested.to_representation))
+        else:
+            # DRF renders a nested serializer over a null relation as None
+            guard = self._column(nullable)
+            self._plan.append((name, lambda row, tz: None if row[guard] is None
+                               else nested.to_representation(row, tz)))
+
+    def _compile_related_pk(self, name, field):
+        self._resolve(field.source_attrs, len(field.source_attrs))
+        column = self._column(LOOKUP_SEP.join(field.source_attrs))
+        # Output like PrimaryKeyRelatedField, which returns the raw pk
+        self._plan.append((name, lambda row, tz: row[column]))
+
+    def _compile_field(self, name, field):
+        source_attrs = field.source_attrs
+        nullable = self._resolve(source_attrs, len(source_attrs) - 1)
+        column = self._column(LOOKUP_SEP.join(source_attrs))
+        convert = _converter(field)
+        if convert is _identity:
+            self._plan.append((name, lambda row, tz: row[column]))
+        else:
+            self._plan.append((name, lambda row, tz: None if (value := row[column]) is None
+                               else convert(value, tz)))
+        if nullable is not None:
+            # DRF leaves a field out when a relation along its source is null
+            self._guards.append((name, self._column(nullable)))
+
+    def to_representation(self, row, tz=False):
+        if tz is False:
+            tz = _current_timezone()
+        data = {name: get(row, tz) for name, get in self._plan}
+        for name, guard in self._guards:
+            if row[guard] is None:
+                del data[name]
+        return data
+
+    def many(self, rows):
+        to_representation = self.to_representation
+        tz = _current_timezone()
+        return [to_representation(row, tz) for row in rows]
+
+    def shape(self, fields=None, expand=None):
+        """
+        Return the ValuesSerializer for a ``fields`` and ``expand``
+        selection, as iterables of top-level names.  Unknown names raise a
+        ValidationError.
+        """
+        errors = {}
+        if fields is not None:
+            fields = frozenset(fields)
+            if unknown := fields - self.field_names:
+                errors['fields'] = f'Unknown fields: {", ".join(sorted(unknown))}'
+        if expand is not None:
+            expand = frozenset(expand)
+            if unknown := expand - self.expandable:
+                errors['expand'] = f'Cannot expand: {", ".join(sorted(unknown))}'
+        if errors:
+            raise serializers.ValidationError(errors)
+        if fields is None and expand is None:
+            return self
+        return _shaped_rows(self, fields, expand)
+
+
+@lru_cache(maxsize=128)
+def _shaped_rows(rows, fields, expand):
+    return ValuesSerializer(rows.serializer_class, rows.computed, rows.prefix,
+                            fields=fields, expand=expand)
+
+
+COMPUTED_FIELDS = {
+    StudentSerializer: {
+        'full_name': (('first_name', 'last_name'),
+                      lambda first_name, last_name: f'{first_name} {last_name}'),
+    },
+}
+
+student_rows = ValuesSerializer(StudentSerializer, COMPUTED_FIELDS)
+course_rows = ValuesSerializer(CourseSerializer, COMPUTED_FIELDS)
+certificate_rows = ValuesSerializer(CertificateSerializer, COMPUTED_FIELDS)
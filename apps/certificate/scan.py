@@ -0,0 +1,152 @@
+"""
+Async views for the public QR scan endpoints.
+
+They answer the same GET requests as the ``validate`` and ``qr-code``
+actions of CertificateViewSet, with the same bodies and caching headers,
+but skip DRF's authentication, content negotiation and throttling and use
+the async ORM and cache APIs.  Under ASGI a worker serves many concurrent
+scans on its event loop; QR images that have to be rendered are drawn in
+a thread pool of QR_SCAN_RENDER_THREADS threads.
+"""
+import asyncio
+from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.views.decorators.http import require_GET
+
+from .jobs import has_stored_qr_image
+from .models import Certificate
+from .negotiation import preferred_format
+from .renderers import FastJSONRenderer, PNGRenderer, SVGRenderer, WebPRenderer
+from .serializers import QRCodeOptionsSerializer
+from .serving import serve_stored_file
+from .tokens import CertificateTokenError
+from .utils import QR_DATA_FIELDS, get_qr_code_key, qr_code_cache, render_qr_code
+from .validation import (
+    aget_validation_entry, avalidate_certificate_token, patch_validation_response
+)
+
+QR_IMAGE_TYPES = {
+    renderer.format: renderer.media_type
+    for renderer in (PNGRenderer, SVGRenderer, WebPRenderer)
+}
+
+QR_CODE_OPTIONS = frozenset(QRCodeOptionsSerializer().fields)
+
+
+@lru_cache(maxsize=None)
+def get_render_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.QR_SCAN_RENDER_THREADS, thread_name_prefix='qr-render')
+
+
+async def run_in_render_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_executor(), partial(func, *args, **kwargs))
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data),
+                        content_type='application/json', status=status)
+
+
+def negotiate_image_format(request):
+    """
+    Return the QR image format for ``?format=`` or the Accept header, or
+    None for an unknown ``?format=``.  Accept is read like the qr-code
+    action's PreferredFormatNegotiation, so PNG is answered unless SVG or
+    WebP is preferred over it.
+    """
+    image_format = request.GET.get('format')
+    if image_format is not None:
+        return image_format if image_format in QR_IMAGE_TYPES else None
+    return preferred_format(request.headers.get('Accept', ''), QR_IMAGE_TYPES)
+
+
+async def aget_cached_qr_code(key, qr_data, params):
+    """Async get_cached_qr_code(), rendering in the render thread pool."""
+    content = await qr_code_cache.aget(key)
+    if content is None:
+        content = await run_in_render_executor(render_qr_code, qr_data, **params)
+        await qr_code_cache.aset(key, content)
+    return content
+
+
+def read_stored_file(file):
+    with file.open('rb'):
+        return file.read()
+
+
+@require_GET
+async def validate(request):
+    """
+    Validate a certificate from ``?code=`` or a signed ``?token=``, as the
+    GET form of the ``validate`` action.
+    """
+    token = request.GET.get('token')
+    if token:
+        try:
+            return json_response(await avalidate_certificate_token(token))
+        except CertificateTokenError:
+            return json_response(
+                {'is_valid': False, 'message': 'Invalid certificate token'}, status=400)
+    unique_code = request.GET.get('code')
+    if not unique_code:
+        return json_response({'error': 'Unique code is required'}, status=400)
+
+    entry = await aget_validation_entry(unique_code)
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'])
+    if response is None:
+        response = json_response(entry['data'])
+    return patch_validation_response(response, entry)
+
+
+@require_GET
+async def qr_code(request, pk):
+    """Return a certificate's QR image, as the ``qr-code`` action."""
+    image_format = negotiate_image_format(request)
+    if image_format is None:
+        raise Http404
+    try:
+        certificate = await Certificate.objects.only(
+            *QR_DATA_FIELDS, 'qr_image', 'qr_image_key').aget(pk=pk)
+    except Certificate.DoesNotExist:
+        raise Http404
+    options = {}
+    if not QR_CODE_OPTIONS.isdisjoint(request.GET):
+        serializer = QRCodeOptionsSerializer(data=request.GET)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status=400)
+        options = serializer.validated_data
+
+    key, qr_data, params = get_qr_code_key(
+        certificate, image_format=image_format, **options)
+    etag = f'"{key}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content_type = QR_IMAGE_TYPES[image_format]
+        filename = f'certificate_{certificate.id}_qrcode.{image_format}'
+        stored = has_stored_qr_image(certificate, key)
+        if stored and settings.FILE_SERVING_MODE != 'django':
+            # Sent by the front-end server or storage, no file I/O here
+            response = serve_stored_file(
+                certificate.qr_image.name, content_type, filename,
+                storage=certificate.qr_image.storage)
+        else:
+            if stored:
+                content = await run_in_render_executor(read_stored_file, certificate.qr_image)
+            else:
+                content = await aget_cached_qr_code(key, qr_data, params)
+            response = HttpResponse(content, content_type=content_type)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    patch_vary_headers(response, ['Accept'])
+    return response
+
@@ -1,7 +1,9 @@
+import qrcode
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import Student, Certificate, Course
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 
@@ -60,6 +62,17 @@ class CertificateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+# Certificate fields CertificateSerializer reads, for querysets narrowed
+# with select_related('student', 'course', 'created_by') and only()
+CERTIFICATE_SERIALIZER_FIELDS = [
+    'id', 'issue_date', 'expiry_date', 'unique_code', 'status',
+    'created_at', 'updated_at', 'signature', 'created_by__email',
+    *(f'student__{name}' for name in StudentSerializer.Meta.fields
+      if name != 'full_name'),
+    *(f'course__{name}' for name in CourseSerializer.Meta.fields),
+]
+
+
 class CertificateValidationSerializer(serializers.Serializer):
     """Serializer for certificate validation endpoint."""
     unique_code = serializers.CharField()
@@ -67,6 +80,72 @@ class CertificateValidationSerializer(serializers.Serializer):
     certificate = CertificateSerializer(read_only=True)
     message = serializers.CharField(read_only=True)
 
+
+class StudentImportRowSerializer(serializers.Serializer):
+    """Serializer for a single row of a bulk student import."""
+    student_id = serializers.CharField(max_length=50)
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    email = serializers.EmailField(required=False, allow_null=True)
+    date_of_birth = serializers.DateField(required=False, allow_null=True)
+
+
+class CertificateIssueRowSerializer(serializers.Serializer):
+    """Serializer for a single row of a bulk certificate issuance."""
+    student_id = serializers.UUIDField()
+    course_id = serializers.UUIDField()
+    issue_date = serializers.DateField()
+    expiry_date = serializers.DateField(required=False, allow_null=True)
+    status = serializers.ChoiceField(
+        choices=Certificate.STATUS_CHOICES, default='active')
+
+
+class CertificateIdListSerializer(serializers.Serializer):
+    """Serializer for endpoints that act on a list of certificate IDs."""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False)
+
+
+class CertificateBatchValidationSerializer(serializers.Serializer):
+    """Serializer for validating many unique codes in one request."""
+    unique_codes = serializers.ListField(
+        child=serializers.CharField(max_length=50), allow_empty=False)
+
+    def validate_unique_codes(self, value):
+        limit = settings.VALIDATION_BATCH_MAX_CODES
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f'At most {limit} codes can be validated per request.')
+        return value
+
+
+class QRCodeOptionsSerializer(serializers.Serializer):
+    """Serializer for the render options of the QR code endpoint."""
+    ERROR_CORRECTION_LEVELS = {
+        'L': qrcode.constants.ERROR_CORRECT_L,
+        'M': qrcode.constants.ERROR_CORRECT_M,
+        'Q': qrcode.constants.ERROR_CORRECT_Q,
+        'H': qrcode.constants.ERROR_CORRECT_H,
+    }
+
+    box_size = serializers.ChoiceField(
+        choices=settings.QR_CODE_BOX_SIZES, default=10)
+    border = serializers.ChoiceField(
+        choices=settings.QR_CODE_BORDERS, default=4)
+    error_correction = serializers.ChoiceField(
+        choices=list(ERROR_CORRECTION_LEVELS), default='L')
+
+    def validate_error_correction(self, value):
+        return self.ERROR_CORRECTION_LEVELS[value]
+
+
+class QRSheetOptionsSerializer(serializers.Serializer):
+    """Serializer for the page layout of printable QR sheets."""
+    paper = serializers.ChoiceField(choices=['a4', 'letter'], default='a4')
+    columns = serializers.IntegerField(min_value=1, max_value=6, default=3)
+    rows = serializers.IntegerField(min_value=1, max_value=10, default=4)
+
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True)
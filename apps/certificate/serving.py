@@ -0,0 +1,42 @@
+"""
+Sending files kept in storage without tying up application workers.
+
+FILE_SERVING_MODE picks who moves the bytes once Django has done the
+lookup and permission checks:
+
+- ``django``: a FileResponse; WSGI servers that provide
+  ``wsgi.file_wrapper`` (gunicorn, uWSGI) send local files with sendfile()
+- ``x-accel-redirect``: nginx serves the file from an internal location
+  mapped to FILE_SERVING_ACCEL_PREFIX
+- ``x-sendfile``: Apache mod_xsendfile or lighttpd serve the absolute path
+- ``redirect``: the client is redirected to the storage URL, e.g. S3
+"""
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+
+FILE_SERVING_MODES = ('django', 'x-accel-redirect', 'x-sendfile', 'redirect')
+
+
+def serve_stored_file(name, content_type, filename=None, storage=default_storage):
+    """Return a response that sends the stored file ``name``."""
+    mode = settings.FILE_SERVING_MODE
+    if mode == 'redirect':
+        return HttpResponseRedirect(storage.url(name))
+    if mode == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.FILE_SERVING_ACCEL_PREFIX + quote(name)
+    elif mode == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = storage.path(name)
+    elif mode == 'django':
+        response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+    else:
+        raise ImproperlyConfigured(
+            f'FILE_SERVING_MODE must be one of {", ".join(FILE_SERVING_MODES)}')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
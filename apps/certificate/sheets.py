@@ -0,0 +1,170 @@
+"""
+Printable sheets of QR code labels.
+
+Certificates are laid out ``columns x rows`` per A4 or Letter page, each
+captioned with the student's name and the course.  Every code is rendered
+once straight into a 1-bit page bitmap, pages are rendered across a
+process pool, and the sheets are streamed as one multi-page PDF or as a
+ZIP of PNG pages, so large cohorts never produce per-code files.
+"""
+import zlib
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageDraw
+
+from .documents import load_font, qr_bitmap
+from .utils import (
+    QR_DATA_FIELDS, chunked, get_qr_data, get_validation_url, imap_bounded, iter_zip
+)
+
+# Certificate fields sheet labels read, for querysets narrowed with only()
+QR_SHEET_FIELDS = [
+    *QR_DATA_FIELDS, 'student__first_name', 'student__last_name', 'course__name']
+
+# Portrait paper sizes in inches
+PAPER_SIZES = {
+    'a4': (8.27, 11.69),
+    'letter': (8.5, 11.0),
+}
+
+SHEET_MARGIN = 0.4
+
+
+def sheet_label(certificate, validation_url=None):
+    """Return ``(qr_data, caption lines)`` for one label."""
+    return (get_qr_data(certificate, validation_url),
+            [certificate.student.full_name, certificate.course.name])
+
+
+def _truncate(text, font, max_width):
+    if font.getlength(text) <= max_width:
+        return text
+    while text and font.getlength(text + '…') > max_width:
+        text = text[:-1]
+    return text + '…'
+
+
+def render_sheet_page(page):
+    """Draw one ``(layout, labels)`` page as a 1-bit image."""
+    (paper, columns, rows, dpi), labels = page
+    width, height = (int(inches * dpi) for inches in PAPER_SIZES[paper])
+    margin = int(SHEET_MARGIN * dpi)
+    cell_width = (width - 2 * margin) // columns
+    cell_height = (height - 2 * margin) // rows
+    font = load_font(max(8, min(int(0.12 * dpi), cell_height // 12)))
+    line_height = int(font.size * 1.25)
+    qr_size = min(cell_width, cell_height - 2 * line_height)
+
+    image = Image.new('1', (width, height), 1)
+    draw = ImageDraw.Draw(image)
+    for index, (qr_data, captions) in enumerate(labels):
+        left = margin + index % columns * cell_width
+        top = margin + index // columns * cell_height
+        qr = qr_bitmap(qr_data, qr_size)
+        image.paste(qr, (left + (cell_width - qr.width) // 2, top))
+        center = left + cell_width // 2
+        for line, caption in enumerate(captions):
+            draw.text((center, top + qr.height + line * line_height),
+                      _truncate(caption, font, cell_width - line_height), font=font,
+                      fill=0, anchor='ma')
+    return image
+
+
+def render_sheet_page_pdf(page):
+    """Render a page to ``(width, height, compressed 1-bit rows)``."""
+    image = render_sheet_page(page)
+    # Mode '1' rows are packed MSB first with white as 1, which is what a
+    # DeviceGray image with one bit per component expects
+    return image.width, image.height, zlib.compress(image.tobytes())
+
+
+def render_sheet_page_png(page):
+    buffer = BytesIO()
+    render_sheet_page(page).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _iter_pages(certificates, paper, columns, rows):
+    validation_url = get_validation_url()
+    layout = (paper, columns, rows, settings.CERTIFICATE_PDF_DPI)
+    labels = (sheet_label(certificate, validation_url) for certificate in certificates)
+    empty = True
+    for batch in chunked(labels, columns * rows):
+        empty = False
+        yield layout, batch
+    if empty:
+        yield layout, []
+
+
+def iter_pdf(pages, dpi):
+    """
+    Stream a PDF whose pages are each one full-page 1-bit image, given
+    ``(width, height, compressed rows)`` per page.  The page tree and
+    cross-reference table are written last, so pages are emitted as soon
+    as they are rendered.
+    """
+    offsets = {}
+    position = 0
+
+    def write(number, body, stream=None):
+        nonlocal position
+        chunk = b'%d 0 obj\n' % number + body
+        if stream is not None:
+            chunk += b'\nstream\n' + stream + b'\nendstream'
+        chunk += b'\nendobj\n'
+        offsets[number] = position
+        position += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    yield header
+
+    # Objects 1 and 2 are the catalog and page tree, written at the end
+    kids = []
+    number = 3
+    for width, height, data in pages:
+        image, content, page = number, number + 1, number + 2
+        number += 3
+        yield write(image, (
+            b'<< /Type /XObject /Subtype /Image /Width %d /Height %d '
+            b'/ColorSpace /DeviceGray /BitsPerComponent 1 '
+            b'/Filter /FlateDecode /Length %d >>' % (width, height, len(data))
+        ), data)
+        points = (f'{width * 72 / dpi:.2f}', f'{height * 72 / dpi:.2f}')
+        drawing = f'q {points[0]} 0 0 {points[1]} 0 0 cm /Im0 Do Q'.encode('ascii')
+        yield write(content, b'<< /Length %d >>' % len(drawing), drawing)
+        yield write(page, (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {points[0]} {points[1]}] '
+            f'/Resources << /XObject << /Im0 {image} 0 R >> >> '
+            f'/Contents {content} 0 R >>'
+        ).encode('ascii'))
+        kids.append(page)
+
+    references = ' '.join(f'{kid} 0 R' for kid in kids)
+    yield write(2, f'<< /Type /Pages /Kids [{references}] /Count {len(kids)} >>'.encode('ascii'))
+    yield write(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+
+    xref = [b'xref\n0 %d\n' % number, b'0000000000 65535 f \n']
+    xref.extend(b'%010d 00000 n \n' % offsets[index] for index in range(1, number))
+    yield b''.join(xref) + (
+        b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+        % (number, position))
+
+
+def iter_qr_sheet_pdf(certificates, paper='a4', columns=3, rows=4):
+    """Stream label sheets for ``certificates`` as a multi-page PDF."""
+    pages = imap_bounded(
+        render_sheet_page_pdf, _iter_pages(certificates, paper, columns, rows),
+        settings.CERTIFICATE_PDF_WORKERS)
+    return iter_pdf(pages, settings.CERTIFICATE_PDF_DPI)
+
+
+def iter_qr_sheet_zip(certificates, paper='a4', columns=3, rows=4):
+    """Stream label sheets for ``certificates`` as a ZIP of PNG pages."""
+    pages = imap_bounded(
+        render_sheet_page_png, _iter_pages(certificates, paper, columns, rows),
+        settings.CERTIFICATE_PDF_WORKERS)
+    return iter_zip(
+        (f'qr_sheet_{index:04d}.png', png) for index, png in enumerate(pages, 1))
@@ -0,0 +1,31 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .jobs import enqueue_qr_renders_on_commit
+from .models import Student, Certificate, Course
+from .validation import (
+    certificate_status_cache_key, get_validation_cache,
+    invalidate_certificates, invalidate_validation_results
+)
+
+
+@receiver([post_save, post_delete], sender=Certificate)
+def invalidate_certificate_validation(sender, instance, **kwargs):
+    invalidate_validation_results([instance.unique_code])
+    get_validation_cache().delete(certificate_status_cache_key(instance.id))
+
+
+@receiver(post_save, sender=Certificate)
+def queue_qr_render(sender, instance, **kwargs):
+    # Covers new certificates and any change to the QR payload
+    enqueue_qr_renders_on_commit([instance])
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Course)
+def invalidate_related_validation(sender, instance, **kwargs):
+    # Cached validation responses embed the student and course, so every
+    # certificate of a changed student or course has to be dropped.
+    # Deletions cascade to the certificates, which invalidate themselves.
+    if not kwargs.get('created'):
+        invalidate_certificates(instance.certificates.all())
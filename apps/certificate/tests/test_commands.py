@@ -0,0 +1,329 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ..models import Student, Certificate, Course, QRRenderJob
+from ..revocation import (
+    apply_delta, decode_snapshot, is_revoked, load_manifest, revocation_file_path
+)
+
+User = get_user_model()
+
+
+class ImportStudentsCommandTest(TestCase):
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as fileobj:
+            fileobj.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_students_csv(self):
+        """Test the command upserts in batches and reports counts"""
+        Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe',
+            email='john@example.com', date_of_birth=date(2000, 1, 1))
+        path = self.write_file('.csv', (
+            'student_id,first_name,last_name,email\n'
+            'STU001,Johnny,Doe,\n'
+            'STU002,Jane,Smith,jane@example.com\n'
+            'STU003,Jim,Beam,jim@example.com\n'
+            'STU003,James,Beam,\n'
+        ))
+        out = StringIO()
+        call_command('import_students', path, '--batch-size', '2', stdout=out)
+        self.assertIn('Inserted 2, updated 1, rejected 0 students; '
+                      'merged 1 repeated rows', out.getvalue())
+        # Columns left empty or out keep their stored values
+        student = Student.objects.get(student_id='STU001')
+        self.assertEqual(student.first_name, 'Johnny')
+        self.assertEqual(student.email, 'john@example.com')
+        self.assertEqual(student.date_of_birth, date(2000, 1, 1))
+        student = Student.objects.get(student_id='STU003')
+        self.assertEqual(student.first_name, 'James')
+        self.assertEqual(student.email, 'jim@example.com')
+
+
+class VerifySignaturesCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', password='testpass123')
+        student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        course = Course.objects.create(name='Python Programming', duration=10)
+        self.certificates = [
+            Certificate.objects.create(
+                student=student,
+                course=course,
+                issue_date=date.today(),
+                created_by=self.user if index % 2 else None
+            )
+            for index in range(5)
+        ]
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.report = os.path.join(self.tmpdir.name, 'report.csv')
+
+    def read_report(self):
+        with open(self.report, newline='') as fileobj:
+            return list(csv.DictReader(fileobj))
+
+    def test_all_signatures_valid(self):
+        """Test a clean audit across worker processes"""
+        out = StringIO()
+        call_command('verify_signatures', '--report', self.report,
+                     '--workers', '2', '--chunk-size', '2', stdout=out)
+        self.assertIn('Checked 5 certificates, 0 failed', out.getvalue())
+        self.assertEqual(self.read_report(), [])
+
+    def test_reports_tampered_and_missing(self):
+        """Test tampered and unsigned certificates are reported"""
+        tampered, unsigned = self.certificates[1], self.certificates[3]
+        Certificate.objects.filter(pk=tampered.pk).update(issue_date=date(2000, 1, 1))
+        Certificate.objects.filter(pk=unsigned.pk).update(signature=None)
+        with self.assertRaisesMessage(CommandError, '2 failed verification'):
+            call_command('verify_signatures', '--report', self.report,
+                         '--chunk-size', '2', stdout=StringIO())
+        problems = {row['certificate_id']: row['problem'] for row in self.read_report()}
+        self.assertEqual(problems, {str(tampered.id): 'mismatch',
+                                    str(unsigned.id): 'missing'})
+
+    def test_resume_from_checkpoint(self):
+        """Test that an existing checkpoint skips already-checked rows"""
+        ordered = list(Certificate.objects.order_by('created_at', 'id'))
+        checkpoint = os.path.join(self.tmpdir.name, 'checkpoint.json')
+        with open(checkpoint, 'w') as fileobj:
+            json.dump({'created_at': ordered[2].created_at.isoformat(),
+                       'id': str(ordered[2].id), 'checked': 3, 'failed': 0},
+                      fileobj)
+        Certificate.objects.filter(pk=ordered[0].pk).update(signature=None)
+        out = StringIO()
+        call_command('verify_signatures', '--report', self.report,
+                     '--checkpoint', checkpoint, stdout=out)
+        self.assertIn('Checked 5 certificates, 0 failed', out.getvalue())
+        self.assertFalse(os.path.exists(checkpoint))
+
+
+class BuildRevocationListCommandTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmpdir.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        course = Course.objects.create(name='Python Programming', duration=10)
+        self.active, self.revoked, self.lapsed = [
+            Certificate.objects.create(
+                student=student, course=course, issue_date=date(2020, 1, 1),
+                status=certificate_status, expiry_date=expiry_date)
+            for certificate_status, expiry_date in [
+                ('active', None), ('revoked', None), ('active', date(2021, 1, 1))]
+        ]
+
+    def read(self, name):
+        with default_storage.open(revocation_file_path(name), 'rb') as fileobj:
+            return fileobj.read()
+
+    def test_snapshot_and_delta(self):
+        """Test versioned snapshots and deltas that replay to the snapshot"""
+        call_command('build_revocation_list', stdout=StringIO())
+        first = load_manifest()
+        version, entries = decode_snapshot(self.read(first['snapshot']))
+        self.assertEqual((version, len(entries)), (1, 2))
+        self.assertTrue(is_revoked(entries, self.revoked.unique_code))
+        self.assertTrue(is_revoked(entries, self.lapsed.unique_code))
+        self.assertFalse(is_revoked(entries, self.active.unique_code))
+
+        # Nothing changed: no new version
+        call_command('build_revocation_list', stdout=StringIO())
+        self.assertEqual(load_manifest()['version'], 1)
+
+        self.active.status = 'revoked'
+        self.active.save()
+        self.revoked.status = 'active'
+        self.revoked.save()
+        call_command('build_revocation_list', stdout=StringIO())
+        manifest = load_manifest()
+        self.assertEqual(manifest['version'], 2)
+        self.assertEqual(manifest['deltas'][0]['added'], 1)
+        self.assertEqual(manifest['deltas'][0]['removed'], 1)
+        # Kept for validators still holding the first manifest
+        self.assertEqual(manifest['retired'], [first['snapshot']])
+        self.assertEqual(first['snapshot'], 'snapshot-1.bin')
+        self.assertTrue(default_storage.exists(revocation_file_path(first['snapshot'])))
+
+        self.assertEqual(manifest['deltas'][0]['file'], 'delta-1-2.bin')
+        replayed = apply_delta(entries, self.read(manifest['deltas'][0]['file']))
+        self.assertEqual(replayed, decode_snapshot(self.read(manifest['snapshot']))[1])
+        self.assertTrue(is_revoked(replayed, self.active.unique_code))
+        self.assertFalse(is_revoked(replayed, self.revoked.unique_code))
+
+    def test_superseded_files_outlive_one_build(self):
+        """Test files dropped from the manifest are deleted one build later"""
+        call_command('build_revocation_list', stdout=StringIO())
+        first = load_manifest()
+        call_command('build_revocation_list', '--force', '--keep-deltas', '1',
+                     stdout=StringIO())
+        second = load_manifest()
+        call_command('build_revocation_list', '--force', '--keep-deltas', '1',
+                     stdout=StringIO())
+        third = load_manifest()
+
+        self.assertFalse(default_storage.exists(revocation_file_path(first['snapshot'])))
+        self.assertEqual(third['retired'],
+                         [second['snapshot'], second['deltas'][0]['file']])
+        for name in third['retired']:
+            self.assertTrue(default_storage.exists(revocation_file_path(name)))
+        directory = os.path.dirname(default_storage.path(revocation_file_path(third['snapshot'])))
+        self.assertEqual(sorted(os.listdir(directory)), [
+            'delta-1-2.bin', 'delta-2-3.bin', 'manifest.json',
+            'snapshot-2.bin', 'snapshot-3.bin'])
+
+    def test_manifest_with_storage_paths(self):
+        """Test a manifest naming storage paths is republished with bare names"""
+        call_command('build_revocation_list', stdout=StringIO())
+        manifest = load_manifest()
+        manifest['snapshot'] = revocation_file_path(manifest['snapshot'])
+        default_storage.delete(revocation_file_path('manifest.json'))
+        default_storage.save(revocation_file_path('manifest.json'),
+                             ContentFile(json.dumps(manifest).encode('utf-8')))
+
+        call_command('build_revocation_list', stdout=StringIO())
+        manifest = load_manifest()
+        self.assertEqual((manifest['version'], manifest['snapshot']), (2, 'snapshot-2.bin'))
+        self.assertEqual(manifest['retired'], ['snapshot-1.bin'])
+        self.assertEqual(manifest['deltas'][0]['file'], 'delta-1-2.bin')
+
+    def test_download_endpoint(self):
+        """Test published files are downloadable and other names are not"""
+        call_command('build_revocation_list', stdout=StringIO())
+        manifest = load_manifest()
+        client = APIClient()
+        response = client.get(reverse('revocation_file', args=['manifest.json']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), manifest)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response = client.get(reverse('revocation_file', args=[manifest['snapshot']]))
+        self.assertEqual(b''.join(response.streaming_content),
+                         self.read(manifest['snapshot']))
+        self.assertIn('immutable', response['Cache-Control'])
+
+        for name in ['snapshot-99.bin', '..%2Fqrcodes', 'other.txt']:
+            response = client.get(reverse('revocation_file', args=[name]))
+            self.assertEqual(response.status_code, 404)
+
+
+class RenderQRImagesCommandTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmpdir.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        self.course = Course.objects.create(name='Python Programming', duration=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certificate = Certificate.objects.create(
+                student=self.student, course=self.course, issue_date=date(2020, 1, 1))
+
+    def render(self, *args):
+        call_command('render_qr_images', '--once', *args, stdout=StringIO())
+        self.certificate.refresh_from_db()
+
+    def test_new_certificate_is_rendered_and_served(self):
+        """Test issuance queues a render that the qr-code action serves"""
+        self.assertEqual(self.certificate.qr_render_job.status, 'pending')
+        self.render()
+        self.assertEqual(self.certificate.qr_render_job.status, 'done')
+        self.assertTrue(default_storage.exists(self.certificate.qr_image.name))
+
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        with self.certificate.qr_image.open('rb') as fileobj:
+            self.assertEqual(b''.join(response.streaming_content), fileobj.read())
+
+    def test_offloaded_serving_modes(self):
+        """Test stored images are handed off to the front-end server"""
+        self.render()
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        with override_settings(FILE_SERVING_MODE='x-accel-redirect'):
+            response = APIClient().get(url)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         f'/protected-media/{self.certificate.qr_image.name}')
+
+        with override_settings(FILE_SERVING_MODE='x-sendfile'):
+            response = APIClient().get(url)
+        self.assertEqual(response['X-Sendfile'], self.certificate.qr_image.path)
+
+        with override_settings(FILE_SERVING_MODE='redirect'):
+            response = APIClient().get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], self.certificate.qr_image.url)
+        self.assertIn('ETag', response)
+
+    def test_scan_view_serves_stored_image(self):
+        """Test the async scan view reads or hands off the stored image"""
+        self.render()
+        with open(self.certificate.qr_image.path, 'wb') as fileobj:
+            fileobj.write(b'stored')
+        url = reverse('scan_qr_code', args=[self.certificate.id])
+        response = self.client.get(url)
+        self.assertEqual(response.content, b'stored')
+
+        with override_settings(FILE_SERVING_MODE='x-accel-redirect'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Accel-Redirect'],
+                         f'/protected-media/{self.certificate.qr_image.name}')
+
+    def test_saving_unchanged_payload_does_not_requeue(self):
+        """Test only payload changes queue a new render"""
+        self.render()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.certificate.save()
+        self.assertEqual(QRRenderJob.objects.get().status, 'done')
+
+    def test_bulk_issue_queues_renders(self):
+        """Test certificates issued in bulk are queued too"""
+        user = User.objects.create_user(
+            username='admin', password='testpass123', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        rows = [{'student_id': str(self.student.id), 'course_id': str(self.course.id),
+                 'issue_date': '2024-01-01'}] * 2
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(
+                reverse('certificate-bulk-issue'), rows, format='json')
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(QRRenderJob.objects.filter(status='pending').count(), 3)
+
+    def test_enqueue_stale_after_base_url_change(self):
+        """Test --enqueue-stale re-renders images made for an old BASE_URL"""
+        self.render()
+        old_name = self.certificate.qr_image.name
+        with override_settings(BASE_URL='https://certificates.example.org'):
+            self.render('--enqueue-stale')
+        self.assertNotEqual(self.certificate.qr_image.name, old_name)
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertTrue(default_storage.exists(self.certificate.qr_image.name))
+
@@ -122,6 +122,25 @@ class CertificateModelTest(TestCase):
         self.assertTrue(self.certificate.verify_signature())
         self.assertTrue(cert2.verify_signature())
 
+    def test_certificate_issued_with_single_insert(self):
+        """Test that issuing a certificate writes the signature in one query"""
+        course2 = Course.objects.create(
+            name='Java Programming',
+            description='A Java course',
+            duration=8
+        )
+        with self.assertNumQueries(1):
+            cert2 = Certificate.objects.create(
+                student=self.student,
+                course=course2,
+                issue_date=date.today(),
+                created_by=self.user
+            )
+        stored = Certificate.objects.get(pk=cert2.pk)
+        self.assertEqual(stored.signature, cert2.signature)
+        self.assertEqual(stored.created_at, cert2.created_at)
+        self.assertTrue(stored.verify_signature())
+
     def test_certificate_status_choices(self):
         """Test certificate status choices"""
         valid_statuses = ['active', 'expired', 'revoked']
@@ -0,0 +1,131 @@
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from ..models import Student, Certificate, Course
+from datetime import date, timedelta
+
+User = get_user_model()
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpass123',
+            is_staff=True,
+            is_superuser=True
+        )
+        self.student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        self.courses = [
+            Course.objects.create(name=name, duration=10)
+            for name in ('Python', 'Java', 'Go')
+        ]
+        # 25 certificates, several sharing a created_at to exercise the id
+        # tie-breaker
+        created_at = self.student.created_at
+        self.certificates = []
+        for index in range(25):
+            certificate = Certificate.objects.create(
+                student=self.student,
+                course=self.courses[index % 3],
+                issue_date=date.today(),
+                created_by=self.user
+            )
+            Certificate.objects.filter(pk=certificate.pk).update(
+                created_at=created_at + timedelta(seconds=index // 5))
+            self.certificates.append(certificate)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse('certificate-list')
+
+    def walk(self, params):
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = [response.data]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append(response.data)
+        return pages
+
+    def test_page_number_is_default(self):
+        """Test that old clients still get page-number pagination"""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_cursor_walks_every_row_once(self):
+        """Test forward cursor pagination across tied created_at values"""
+        pages = self.walk({'pagination': 'cursor'})
+        self.assertNotIn('count', pages[0])
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(set(ids), {str(c.id) for c in self.certificates})
+        expected = list(Certificate.objects.order_by(
+            '-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, [str(pk) for pk in expected])
+
+    def test_cursor_previous_link(self):
+        """Test that the previous link returns the preceding page"""
+        pages = self.walk({'pagination': 'cursor'})
+        response = self.client.get(pages[-1]['previous'])
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [row['id'] for row in pages[-2]['results']])
+
+    def test_cursor_with_ordering_field(self):
+        """Test cursor pagination keyed on a related ordering field"""
+        pages = self.walk({'pagination': 'cursor', 'ordering': 'course__name'})
+        names = [row['course']['name'] for page in pages for row in page['results']]
+        self.assertEqual(len(names), 25)
+        self.assertEqual(names, sorted(names))
+
+    def test_cursor_nullable_ordering_falls_back(self):
+        """Test that a nullable ordering field falls back to created_at"""
+        pages = self.walk({'pagination': 'cursor', 'ordering': 'expiry_date'})
+        self.assertEqual(sum(len(page['results']) for page in pages), 25)
+
+    def test_cursor_with_sparse_fields(self):
+        """Test cursor pagination when ?fields= leaves out the key columns"""
+        pages = self.walk({'pagination': 'cursor', 'fields': 'status'})
+        rows = [row for page in pages for row in page['results']]
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows[0], {'status': 'active'})
+
+        pages = self.walk({'pagination': 'cursor', 'ordering': 'course__name',
+                           'fields': 'id,student', 'expand': 'student'})
+        ids = [row['id'] for page in pages for row in page['results']]
+        self.assertEqual(set(ids), {str(c.id) for c in self.certificates})
+        self.assertNotIn('course', pages[0]['results'][0])
+
+        for index in range(12):
+            Student.objects.create(
+                student_id=f'STU1{index:02}', first_name='Jane', last_name='Doe')
+        self.list_url = reverse('student-list')
+        pages = self.walk({'pagination': 'cursor', 'fields': 'first_name'})
+        rows = [row for page in pages for row in page['results']]
+        self.assertEqual(len(rows), 13)
+        self.assertEqual(rows[-1], {'first_name': 'John'})
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(self.list_url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_malformed_position(self):
+        """Test that a well-formed cursor with unparsable values is rejected"""
+        for position, ordering in [('["x", "y"]', None), ('["x", "y"]', 'course__name'),
+                                   ('[1]', None), ('{}', None)]:
+            with self.subTest(position=position, ordering=ordering):
+                cursor = b64encode(urlencode({'p': position}).encode()).decode()
+                params = {'cursor': cursor}
+                if ordering:
+                    params['ordering'] = ordering
+                response = self.client.get(self.list_url, params)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,128 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ..models import Student, Certificate, Course
+
+User = get_user_model()
+
+ROW_COUNTS = [1, 10, 100]
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Query counts per endpoint must not grow with the number of rows.
+    Each certificate gets its own student and course so that any lazy
+    relation lookup shows up as extra queries.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            is_staff=True, is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def create_rows(self, count):
+        Student.objects.all().delete()
+        Course.objects.all().delete()
+        students = Student.objects.bulk_create(
+            Student(student_id=f'STU{index:04d}', first_name='First',
+                    last_name=f'Last{index}', email=f's{index}@example.com')
+            for index in range(count))
+        courses = Course.objects.bulk_create(
+            Course(name=f'Course {index}', duration=10) for index in range(count))
+        certificates = []
+        for student, course in zip(students, courses):
+            certificate = Certificate(
+                student=student, course=course, issue_date=date(2024, 1, 1),
+                created_by=self.user)
+            certificate.prepare_issuance()
+            certificates.append(certificate)
+        return Certificate.objects.bulk_create(certificates)
+
+    def assertBudget(self, budget, method, url, data=None, client=None):
+        for count in ROW_COUNTS:
+            with self.subTest(rows=count):
+                certificates = self.create_rows(count)
+                if callable(data):
+                    payload = data(certificates)
+                else:
+                    payload = data
+                if callable(url):
+                    path = url(certificates)
+                else:
+                    path = url
+                cache.clear()
+                with self.assertNumQueries(budget):
+                    response = getattr(client or self.client, method)(
+                        path, payload, format='json')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_certificate_list(self):
+        """Test the certificate list costs a count and a page query"""
+        self.assertBudget(
+            2, 'get', reverse('certificate-list'), {'page_size': 100})
+
+    def test_certificate_list_cursor(self):
+        """Test keyset pages cost a single query"""
+        self.assertBudget(
+            1, 'get', reverse('certificate-list'), {'pagination': 'cursor'})
+
+    def test_certificate_retrieve(self):
+        """Test retrieving a certificate costs one query"""
+        self.assertBudget(1, 'get', lambda certificates: reverse(
+            'certificate-detail', args=[certificates[-1].id]))
+
+    def test_certificate_pdf(self):
+        """Test a certificate PDF loads its student and course in the same query"""
+        self.assertBudget(1, 'get', lambda certificates: reverse(
+            'certificate-pdf', args=[certificates[-1].id]))
+
+    def test_certificate_sparse_fields(self):
+        """Test unrequested relations are not joined"""
+        self.create_rows(10)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('certificate-list'), {
+                'fields': 'id,status,course', 'expand': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = context.captured_queries[-1]['sql']
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"signature"', sql)
+
+    def test_validate(self):
+        """Test an uncached validation costs one query"""
+        self.assertBudget(
+            1, 'post', reverse('certificate-validate'),
+            lambda certificates: {'unique_code': certificates[-1].unique_code})
+
+    def test_validate_batch(self):
+        """Test batch validation costs one query for any number of codes"""
+        self.assertBudget(
+            1, 'post', reverse('certificate-validate-batch'),
+            lambda certificates: {
+                'unique_codes': [cert.unique_code for cert in certificates]})
+
+    def test_student_and_course_lists(self):
+        """Test the student and course lists cost a count and a page query"""
+        self.assertBudget(2, 'get', reverse('student-list'))
+        self.assertBudget(2, 'get', reverse('course-list'))
+
+    @override_settings(
+        STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_admin_changelist(self):
+        """Test the certificate changelist does not query per row"""
+        client = APIClient()
+        client.force_login(self.user)
+        self.assertBudget(
+            5, 'get', reverse('admin:certificate_certificate_changelist'),
+            client=client)
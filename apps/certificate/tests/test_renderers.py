@@ -0,0 +1,115 @@
+import gzip
+import io
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from ..middleware import CompressionMiddleware, accepted_encodings, brotli
+from ..models import Course
+from ..parsers import FastJSONParser
+from ..renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class FastJSONTest(TestCase):
+    def test_renderer_matches_json_renderer(self):
+        """Test native encoding gives the same JSON as DRF's encoder"""
+        data = {
+            'id': uuid.uuid4(), 'issued': date(2024, 1, 31),
+            'created_at': datetime(2024, 1, 31, 12, 30, 5, 120000, tzinfo=timezone.utc),
+            'price': Decimal('9.50'), 'name': 'Zoë', 'tags': ['a', None, 1.5],
+            'separators': 'a\u2028b\u2029c',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # Wider than orjson's 64-bit integers
+        data['big'] = 2 ** 70
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_renderer_indent_falls_back(self):
+        """Test indented output is still available"""
+        content = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=4', {})
+        self.assertEqual(content, b'{\n    "a": 1\n}')
+
+    def test_parser(self):
+        """Test request bodies are parsed and malformed JSON is rejected"""
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"a": ["ü", 1]}'.encode())),
+                         {'a': ['ü', 1]})
+        with self.assertRaises(Exception) as context:
+            parser.parse(io.BytesIO(b'{"a": NaN}'))
+        self.assertEqual(context.exception.status_code, 400)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            is_staff=True, is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        Course.objects.bulk_create(
+            Course(name=f'Course {index}', description='A course ' * 10, duration=10)
+            for index in range(10))
+        self.url = reverse('course-list')
+
+    def test_accepted_encodings(self):
+        """Test q=0 codings are not accepted"""
+        self.assertEqual(accepted_encodings('gzip;q=0.5, br;q=0, deflate'),
+                         {'gzip', 'deflate'})
+
+    def test_gzip(self):
+        """Test large JSON responses are gzipped when accepted"""
+        plain = self.client.get(self.url)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        """Test responses under the threshold are sent as is"""
+        response = self.client.get(self.url, {'page_size': 1, 'fields': 'id'},
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli_only_for_api_types_without_cookies(self):
+        """Test brotli skips HTML and cookie-setting responses, which gzip pads"""
+        fake_brotli = mock.Mock()
+        fake_brotli.compress.side_effect = lambda content, quality: b'br' + content[:10]
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, br')
+        middleware = CompressionMiddleware(lambda request: None)
+        body = b'{"a": "' + b'x' * 2000 + b'"}'
+
+        def compress(content_type, cookie=False):
+            response = HttpResponse(body, content_type=content_type)
+            if cookie:
+                response.set_cookie('csrftoken', 'secret')
+            with mock.patch('apps.certificate.middleware.brotli', fake_brotli):
+                return middleware.process_response(request, response)
+
+        response = compress('application/json')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'br' + body[:10])
+        self.assertEqual(compress('text/html')['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            compress('application/json', cookie=True)['Content-Encoding'], 'gzip')
+
+    @skipUnless(brotli, 'brotli is not installed')
+    def test_brotli(self):
+        """Test brotli is preferred when accepted"""
+        plain = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
@@ -1,8 +1,12 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from ..models import Student, Certificate, Course
-from ..serializers import StudentSerializer, CertificateSerializer, CertificateValidationSerializer
+from ..serializers import (
+    StudentSerializer, CertificateSerializer, CertificateValidationSerializer, CourseSerializer
+)
+from ..rows import certificate_rows, course_rows, student_rows
 from datetime import date, timedelta
+import json
 import uuid
 
 User = get_user_model()
@@ -171,3 +175,44 @@ class CertificateValidationSerializerTest(TestCase):
         }
         serializer = CertificateValidationSerializer(data=data)
         self.assertTrue(serializer.is_valid())
+
+
+class ValuesSerializerParityTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123')
+        full = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe',
+            email='john.doe@example.com', date_of_birth=date(1990, 1, 1))
+        sparse = Student.objects.create(
+            student_id='STU002', first_name='Jane', last_name='Smith')
+        course = Course.objects.create(
+            name='Python Programming', description='A Python course', duration=10)
+        bare_course = Course.objects.create(name='Go', duration=4)
+        Certificate.objects.create(
+            student=full, course=course, issue_date=date(2024, 1, 1),
+            expiry_date=date(2025, 1, 1), created_by=self.user)
+        # No creator: the serializer leaves created_by_email out entirely
+        Certificate.objects.create(
+            student=sparse, course=bare_course, issue_date=date(2024, 2, 1),
+            status='revoked')
+
+    def assertParity(self, rows, serializer_class):
+        queryset = serializer_class.Meta.model.objects.all()
+        expected = serializer_class(queryset, many=True).data
+        actual = rows.many(queryset.values(*rows.columns))
+        self.assertEqual(len(actual), 2)
+        # Same keys, order and values once rendered
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_student_rows_match_serializer(self):
+        """Test values() student rows render like StudentSerializer"""
+        self.assertParity(student_rows, StudentSerializer)
+
+    def test_course_rows_match_serializer(self):
+        """Test values() course rows render like CourseSerializer"""
+        self.assertParity(course_rows, CourseSerializer)
+
+    def test_certificate_rows_match_serializer(self):
+        """Test values() certificate rows render like CertificateSerializer"""
+        self.assertParity(certificate_rows, CertificateSerializer)
@@ -0,0 +1,145 @@
+import base64
+import io
+import json
+from datetime import date, timedelta
+
+import qrcode
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from ..models import Student, Certificate, Course
+from ..tokens import (
+    CertificateTokenError, issue_certificate_token, verify_certificate_token
+)
+from ..utils import QRCodeCache, get_qr_data, render_qr_code
+
+User = get_user_model()
+
+
+class QRCodeCacheTest(TestCase):
+    def setUp(self):
+        self.cache = QRCodeCache()
+
+    def test_cache_key_depends_on_render_parameters(self):
+        """Test that payload and render parameters both change the key"""
+        key = QRCodeCache.make_key('payload', box_size=10)
+        self.assertEqual(key, QRCodeCache.make_key('payload', box_size=10))
+        self.assertNotEqual(key, QRCodeCache.make_key('payload', box_size=5))
+        self.assertNotEqual(key, QRCodeCache.make_key('other', box_size=10))
+
+    def test_render_is_deterministic(self):
+        """Test that the same payload renders to the same bytes"""
+        self.assertEqual(render_qr_code('payload'), render_qr_code('payload'))
+
+    def test_direct_png_matches_pil_render(self):
+        """Test the direct encoder produces the same pixels as PIL"""
+        for box_size, border in [(10, 4), (3, 1)]:
+            qr = qrcode.QRCode(
+                box_size=box_size, border=border,
+                error_correction=qrcode.constants.ERROR_CORRECT_L)
+            qr.add_data('https://example.com/validate/?code=abc')
+            qr.make(fit=True)
+            expected = qr.make_image(fill_color="black", back_color="white")
+            image = Image.open(io.BytesIO(render_qr_code(
+                'https://example.com/validate/?code=abc',
+                box_size=box_size, border=border)))
+            self.assertEqual(image.mode, '1')
+            self.assertEqual(image.size, expected.size)
+            self.assertEqual(image.convert('L').tobytes(),
+                             expected.convert('L').tobytes())
+
+    def test_webp_matches_png(self):
+        """Test WebP renders carry the same pixels as the PNG"""
+        png = Image.open(io.BytesIO(render_qr_code('payload')))
+        webp = Image.open(io.BytesIO(render_qr_code('payload', image_format='webp')))
+        self.assertEqual(webp.format, 'WEBP')
+        self.assertEqual(webp.convert('L').tobytes(), png.convert('L').tobytes())
+
+    @override_settings(QR_CODE_CACHE_MAX_BYTES=10)
+    def test_lru_evicts_within_byte_budget(self):
+        """Test that the in-process tier stays within its byte budget"""
+        self.cache._remember('a', b'12345')
+        self.cache._remember('b', b'12345')
+        self.cache._remember('c', b'12345')
+        self.assertNotIn('a', self.cache._entries)
+        self.assertEqual(list(self.cache._entries), ['b', 'c'])
+        self.assertEqual(self.cache._size, 10)
+
+    def test_shared_tier_fills_local_tier(self):
+        """Test that a shared-tier hit is promoted into the local LRU"""
+        self.cache.set('k', b'png')
+        self.cache.clear()
+        self.assertEqual(self.cache.get('k'), b'png')
+        self.assertIn('k', self.cache._entries)
+
+
+@override_settings(CERTIFICATE_TOKEN_KEYS={'k1': 'test-token-secret'})
+class CertificateTokenTest(TestCase):
+    def setUp(self):
+        student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        course = Course.objects.create(name='Python Programming', duration=10)
+        self.certificate = Certificate.objects.create(
+            student=student,
+            course=course,
+            issue_date=date.today(),
+            expiry_date=date(2030, 1, 1)
+        )
+
+    def test_token_round_trip(self):
+        """Test that issued tokens verify and carry the certificate claims"""
+        claims = verify_certificate_token(issue_certificate_token(self.certificate))
+        self.assertEqual(claims['cid'], str(self.certificate.id))
+        self.assertEqual(claims['code'], self.certificate.unique_code)
+        self.assertEqual(claims['st'], 'active')
+        self.assertEqual(claims['exd'], '2030-01-01')
+
+    def test_tampered_token_rejected(self):
+        """Test that a token with altered claims or unknown key fails"""
+        header, payload, signature = issue_certificate_token(
+            self.certificate).split('.')
+        with self.assertRaises(CertificateTokenError):
+            verify_certificate_token(f'{header}.{payload}x.{signature}')
+        with self.assertRaises(CertificateTokenError):
+            verify_certificate_token('not-a-token')
+        with override_settings(CERTIFICATE_TOKEN_KEYS={'k2': 'other'}):
+            with self.assertRaises(CertificateTokenError):
+                verify_certificate_token(f'{header}.{payload}.{signature}')
+
+    def test_malformed_key_id_rejected(self):
+        """Test that a header with a missing or non-string kid fails cleanly"""
+        _, payload, signature = issue_certificate_token(self.certificate).split('.')
+        for header in [{'alg': 'HS256', 'kid': [1]}, {'alg': 'HS256', 'kid': {}},
+                       {'alg': 'HS256'}]:
+            encoded = base64.urlsafe_b64encode(
+                json.dumps(header).encode()).rstrip(b'=').decode()
+            with self.assertRaises(CertificateTokenError):
+                verify_certificate_token(f'{encoded}.{payload}.{signature}')
+
+    def test_reissued_token_is_newer(self):
+        """Test a token issued after revocation carries a later iat"""
+        self.certificate.updated_at -= timedelta(days=1)
+        claims = verify_certificate_token(issue_certificate_token(self.certificate))
+        self.certificate.status = 'revoked'
+        self.certificate.save()
+        revoked = verify_certificate_token(issue_certificate_token(self.certificate))
+        self.assertEqual(revoked['st'], 'revoked')
+        self.assertGreater(revoked['iat'], claims['iat'])
+
+    def test_token_requires_dedicated_key(self):
+        """Test no token is issued or accepted without a token key"""
+        token = issue_certificate_token(self.certificate)
+        with override_settings(CERTIFICATE_TOKEN_KEYS={}):
+            with self.assertRaises(ImproperlyConfigured):
+                issue_certificate_token(self.certificate)
+            with self.assertRaises(CertificateTokenError):
+                verify_certificate_token(token)
+
+    @override_settings(QR_CODE_SIGNED_TOKENS=True)
+    def test_qr_data_embeds_token(self):
+        """Test the QR payload carries a stable signed token when enabled"""
+        qr_data = get_qr_data(self.certificate)
+        self.assertIn('&token=', qr_data)
+        self.assertEqual(qr_data, get_qr_data(self.certificate))
@@ -1,9 +1,19 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import zipfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
 from ..models import Student, Certificate, Course
+from ..tokens import issue_certificate_token
+from ..validation import validation_cache_timeout
 from datetime import date, timedelta
 
 User = get_user_model()
@@ -76,6 +86,40 @@ class StudentViewSetTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Student.objects.count(), 0)
 
+    def test_filter_students_by_full_name(self):
+        """Test that name filter matches first and last name terms"""
+        Student.objects.create(
+            student_id='STU002', first_name='Jane', last_name='Doe')
+        response = self.client.get(self.list_url, {'name': 'doe'})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(self.list_url, {'name': 'john doe'})
+        self.assertEqual(
+            [row['student_id'] for row in response.data['results']],
+            ['STU001'])
+
+    def test_import_students(self):
+        """Test upserting students from an NDJSON upload"""
+        content = (
+            '{"student_id": "STU001", "first_name": "Johnny", "last_name": "Doe"}\n'
+            '{"student_id": "STU002", "first_name": "Jane", "last_name": "Smith"}\n'
+            '{"student_id": "STU003"}\n'
+            'not json\n'
+        ).encode()
+        upload = SimpleUploadedFile('students.ndjson', content)
+        response = self.client.post(
+            reverse('student-import-students'), {'file': upload},
+            format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['inserted'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['rejected'], 2)
+        self.assertEqual(response.data['duplicates'], 0)
+        self.assertEqual([error['row'] for error in response.data['errors']],
+                         [2, 3])
+        self.student.refresh_from_db()
+        self.assertEqual(self.student.first_name, 'Johnny')
+        self.assertEqual(Student.objects.count(), 2)
+
 
 class CertificateViewSetTest(TestCase):
     def setUp(self):
@@ -126,6 +170,15 @@ class CertificateViewSetTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def test_filter_certificates_by_student_full_name(self):
+        """Test that student_name filter supports full-name queries"""
+        response = self.client.get(
+            self.list_url, {'student_name': 'John Doe'})
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(
+            self.list_url, {'student_name': 'Jane Doe'})
+        self.assertEqual(len(response.data['results']), 0)
+
     def test_create_certificate(self):
         """Test creating a new certificate"""
         data = {
@@ -148,6 +201,30 @@ class CertificateViewSetTest(TestCase):
         self.assertEqual(response.data['course']['id'], str(self.course.id))
         self.assertEqual(response.data['course']['name'], self.course.name)
 
+    def test_certificate_fields_and_expand(self):
+        """Test ?fields= and ?expand= shape certificate responses"""
+        response = self.client.get(self.list_url, {'fields': 'id,status'})
+        self.assertEqual(response.data['results'][0], {
+            'id': str(self.certificate.id), 'status': 'active'})
+
+        response = self.client.get(
+            self.detail_url, {'fields': 'id,student,course', 'expand': 'course'})
+        self.assertEqual(str(response.data['student']), str(self.student.id))
+        self.assertEqual(response.data['course']['name'], self.course.name)
+
+        response = self.client.get(self.detail_url, {'expand': ''})
+        self.assertEqual(str(response.data['course']), str(self.course.id))
+        self.assertIn('issue_date', response.data)
+
+    def test_certificate_unknown_fields(self):
+        """Test unknown field or expansion names are rejected"""
+        response = self.client.get(self.list_url, {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.data)
+        response = self.client.get(self.list_url, {'expand': 'status'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('expand', response.data)
+
     def test_update_certificate(self):
         """Test updating a certificate"""
         # Create another course
@@ -177,9 +254,509 @@ class CertificateViewSetTest(TestCase):
         self.assertEqual(response.data['certificate']
                          ['id'], str(self.certificate.id))
 
+    def test_validate_is_cached_and_invalidated(self):
+        """Test validation responses are cached until a write invalidates them"""
+        cache.clear()
+        data = {'unique_code': self.certificate.unique_code}
+        self.client.post(self.validate_url, data)
+        with self.assertNumQueries(0):
+            response = self.client.post(self.validate_url, data)
+        self.assertTrue(response.data['is_valid'])
+
+        self.certificate.status = 'revoked'
+        self.certificate.save()
+        response = self.client.post(self.validate_url, data)
+        self.assertFalse(response.data['is_valid'])
+
+        self.student.first_name = 'Johnny'
+        self.student.save()
+        response = self.client.post(self.validate_url, data)
+        self.assertEqual(
+            response.data['certificate']['student']['first_name'], 'Johnny')
+
+    def test_validate_get(self):
+        """Test GET validation with the code from the QR URL and HTTP caching"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(
+            self.validate_url, {'code': self.certificate.unique_code})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_valid'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+
+        etag = response['ETag']
+        response = self.client.get(
+            self.validate_url, {'code': self.certificate.unique_code},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(
+            self.validate_url, {'code': self.certificate.unique_code},
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.certificate.status = 'revoked'
+        self.certificate.save()
+        response = self.client.get(
+            self.validate_url, {'code': self.certificate.unique_code},
+            HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_valid'])
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_validate_get_browsable_api_is_private(self):
+        """Test the HTML rendering is not publicly cached or matched by the JSON ETag"""
+        self.client.force_authenticate(user=None)
+        params = {'code': self.certificate.unique_code}
+        json_response = self.client.get(self.validate_url, params)
+        response = self.client.get(self.validate_url, params, HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', response['Content-Type'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotIn('public', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+        self.assertIn('Accept', json_response['Vary'])
+
+        response = self.client.get(self.validate_url, params, HTTP_ACCEPT='text/html',
+                                   HTTP_IF_NONE_MATCH=json_response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_validate_get_requires_code(self):
+        """Test GET validation without a code"""
+        response = self.client.get(self.validate_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(VALIDATION_LOCAL_CACHE_TIMEOUT=5)
+    def test_local_validation_cache_timeout_is_capped(self):
+        """Test per-process caches keep validation entries only briefly"""
+        self.assertEqual(validation_cache_timeout(self.certificate), 5)
+        self.assertEqual(validation_cache_timeout(None), 5)
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            self.assertEqual(validation_cache_timeout(self.certificate),
+                             settings.VALIDATION_CACHE_TIMEOUT)
+
+    def test_validate_rejects_non_string_codes(self):
+        """Test malformed JSON bodies are rejected instead of failing"""
+        for data in [{'unique_code': 5}, {'unique_code': ['a']},
+                     {'token': ['a']}, ['a']]:
+            with self.subTest(data=data):
+                response = self.client.post(self.validate_url, data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(CERTIFICATE_TOKEN_KEYS={'k1': 'test-token-secret'})
+    def test_validate_token(self):
+        """Test validating a signed QR token checks only revocation state"""
+        cache.clear()
+        token = issue_certificate_token(self.certificate)
+        self.client.get(self.validate_url, {'token': token})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.validate_url, {'token': token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_valid'])
+        self.assertEqual(response.data['unique_code'], self.certificate.unique_code)
+
+        self.certificate.status = 'revoked'
+        self.certificate.save()
+        response = self.client.post(self.validate_url, {'token': token})
+        self.assertFalse(response.data['is_valid'])
+        self.assertEqual(response.data['status'], 'revoked')
+
+        response = self.client.get(self.validate_url, {'token': token + 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # A forged header whose kid is not a string
+        forged = 'eyJhbGciOiJIUzI1NiIsImtpZCI6WzFdfQ.' + token.split('.', 1)[1]
+        response = self.client.get(self.validate_url, {'token': forged})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_validate_batch(self):
+        """Test batch validation resolves codes in one query, in input order"""
+        cache.clear()
+        revoked = Certificate.objects.create(
+            student=self.student,
+            course=self.course,
+            issue_date=date.today(),
+            status='revoked',
+            created_by=self.user
+        )
+        codes = ['missing', revoked.unique_code, self.certificate.unique_code]
+        url = reverse('certificate-validate-batch')
+        with self.assertNumQueries(1):
+            response = self.client.post(url, {'unique_codes': codes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([r['unique_code'] for r in results], codes)
+        self.assertEqual([r['status'] for r in results],
+                         ['not_found', 'invalid', 'valid'])
+        self.assertEqual(results[2]['certificate']['id'], str(self.certificate.id))
+
+        with self.assertNumQueries(0):
+            self.client.post(url, {'unique_codes': codes}, format='json')
+
+    @override_settings(VALIDATION_BATCH_MAX_CODES=2)
+    def test_validate_batch_limit(self):
+        """Test batch validation rejects more codes than allowed"""
+        response = self.client.post(
+            reverse('certificate-validate-batch'),
+            {'unique_codes': ['a', 'b', 'c']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_validate_invalid_certificate(self):
         """Test certificate validation with invalid code"""
         data = {'unique_code': 'invalid-code'}
         response = self.client.post(self.validate_url, data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertFalse(response.data['is_valid'])
+
+    def test_qr_code(self):
+        """Test QR code endpoint returns a PNG with a strong ETag"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertFalse(response['ETag'].startswith('W/'))
+
+    def test_qr_code_not_modified(self):
+        """Test QR code endpoint honours If-None-Match"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_qr_code_svg(self):
+        """Test QR code endpoint renders SVG when asked with ?format="""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        response = self.client.get(url, {'format': 'svg'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertTrue(response.content.startswith(b'<svg'))
+        self.assertIn('qrcode.svg', response['Content-Disposition'])
+        self.assertIn('Accept', response['Vary'])
+
+    def test_qr_code_webp_by_accept(self):
+        """Test QR code endpoint negotiates WebP from the Accept header"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        response = self.client.get(url, HTTP_ACCEPT='image/webp')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertEqual(response.content[8:12], b'WEBP')
+
+    def test_qr_code_browser_accept(self):
+        """Test PNG is kept unless another image type is preferred over it"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        for accept in [
+            'image/avif,image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+            'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,'
+            'image/webp,*/*;q=0.8',
+            'application/json',
+        ]:
+            response = self.client.get(url, HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'image/png')
+        for accept, content_type in [
+            ('image/webp,image/png,image/svg+xml,image/*;q=0.8,*/*;q=0.5', 'image/png'),
+            ('image/png;q=0.5, image/svg+xml', 'image/svg+xml'),
+            ('image/webp, */*;q=0', 'image/webp'),
+        ]:
+            response = self.client.get(url, HTTP_ACCEPT=accept)
+            self.assertEqual(response['Content-Type'], content_type)
+
+    def test_qr_code_options(self):
+        """Test render options change the image and its ETag"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        default = self.client.get(url)
+        small = self.client.get(
+            url, {'box_size': 2, 'border': 1, 'error_correction': 'H'})
+        self.assertEqual(small.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(small['ETag'], default['ETag'])
+        self.assertLess(len(small.content), len(default.content))
+
+    def test_qr_code_invalid_options(self):
+        """Test options outside the allowed set are rejected"""
+        url = reverse('certificate-qr-code', args=[self.certificate.id])
+        response = self.client.get(url, {'box_size': 1000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('box_size', response.json())
+
+    @override_settings(QR_BULK_EXPORT_WORKERS=2, QR_BULK_EXPORT_BATCH_SIZE=1)
+    def test_bulk_qr_codes(self):
+        """Test bulk QR export streams a ZIP rendered in a process pool"""
+        other = Certificate.objects.create(
+            student=self.student,
+            course=self.course,
+            issue_date=date.today(),
+            created_by=self.user
+        )
+        response = self.client.get(reverse('certificate-qr-codes'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(f'certificate_{cert.id}_qrcode.png'
+                   for cert in (self.certificate, other)))
+        for name in archive.namelist():
+            self.assertTrue(archive.read(name).startswith(b'\x89PNG'))
+
+    def test_certificate_pdf(self):
+        """Test a single certificate renders as a PDF"""
+        url = reverse('certificate-pdf', args=[self.certificate.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(response.content.startswith(b'%PDF'))
+
+    @override_settings(CERTIFICATE_PDF_WORKERS=2, CERTIFICATE_PDF_BATCH_SIZE=1)
+    def test_bulk_certificate_pdfs(self):
+        """Test bulk PDFs stream as a ZIP rendered in a process pool"""
+        other = Certificate.objects.create(
+            student=self.student,
+            course=self.course,
+            issue_date=date.today(),
+            created_by=self.user
+        )
+        response = self.client.post(
+            reverse('certificate-pdfs'), {'ids': [str(other.id)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), [f'certificate_{other.id}.pdf'])
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+
+    def test_qr_sheet_pdf(self):
+        """Test QR label sheets stream as one page per grid of codes"""
+        for _ in range(4):
+            Certificate.objects.create(
+                student=self.student, course=self.course,
+                issue_date=date.today(), created_by=self.user)
+        response = self.client.get(
+            reverse('certificate-qr-sheet'), {'columns': 2, 'rows': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        content = b''.join(response.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertIn(b'/Count 2 ', content)
+        # Every cross-reference entry points at its object
+        xref = content[int(content.rsplit(b'startxref', 1)[1].split()[0]):]
+        for number, line in enumerate(xref.split(b'\n')[3:], 1):
+            if line.startswith(b'trailer'):
+                break
+            offset = int(line.split()[0])
+            self.assertTrue(content[offset:].startswith(b'%d 0 obj' % number))
+
+    def test_qr_sheet_png_pages(self):
+        """Test QR label sheets as a ZIP of PNG pages on Letter paper"""
+        response = self.client.get(
+            reverse('certificate-qr-sheet'), {'format': 'zip', 'paper': 'letter'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), ['qr_sheet_0001.png'])
+        self.assertTrue(archive.read('qr_sheet_0001.png').startswith(b'\x89PNG'))
+
+    def test_qr_sheet_invalid_layout(self):
+        """Test grid sizes outside the allowed range are rejected"""
+        response = self.client.get(reverse('certificate-qr-sheet'), {'columns': 50})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_qr_codes_by_ids(self):
+        """Test bulk QR export narrowed to a list of IDs"""
+        Certificate.objects.create(
+            student=self.student,
+            course=self.course,
+            issue_date=date.today(),
+            created_by=self.user
+        )
+        response = self.client.post(
+            reverse('certificate-qr-codes'),
+            {'ids': [str(self.certificate.id)]}, format='json')
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(archive.namelist(),
+                         [f'certificate_{self.certificate.id}_qrcode.png'])
+
+        response = self.client.get(
+            reverse('certificate-qr-codes'), {'ids': 'not-a-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for name in ['certificate-qr-codes', 'certificate-pdfs', 'certificate-qr-sheet']:
+            response = self.client.post(
+                reverse(name), [str(self.certificate.id)], format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_issue_json(self):
+        """Test bulk issuance reports per-row results and errors"""
+        rows = [
+            {
+                'student_id': str(self.student.id),
+                'course_id': str(self.course.id),
+                'issue_date': date.today().isoformat(),
+            }
+            for _ in range(5)
+        ]
+        rows.append({'student_id': str(self.student.id),
+                     'course_id': str(self.student.id),
+                     'issue_date': date.today().isoformat()})
+        rows.append({'student_id': 'nope'})
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                reverse('certificate-bulk-issue'), rows, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(response.data['results'][5]['errors'],
+                         {'course_id': ['Course not found.']})
+        self.assertIn('issue_date', response.data['results'][6]['errors'])
+        self.assertEqual(Certificate.objects.count(), 6)
+        for certificate in Certificate.objects.all():
+            self.assertTrue(certificate.verify_signature())
+
+    def test_bulk_issue_csv(self):
+        """Test bulk issuance from an uploaded CSV file"""
+        content = (
+            'student_id,course_id,issue_date,expiry_date\n'
+            f'{self.student.id},{self.course.id},2024-01-01,\n'
+            f'{self.student.id},{self.course.id},2024-01-01,2025-01-01\n'
+        ).encode()
+        upload = SimpleUploadedFile('rows.csv', content, 'text/csv')
+        response = self.client.post(
+            reverse('certificate-bulk-issue'), {'file': upload},
+            format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(
+            Certificate.objects.filter(expiry_date=date(2025, 1, 1)).count(), 1)
+
+    def test_export_csv(self):
+        """Test streaming CSV export of filtered certificates"""
+        response = self.client.get(reverse('certificate-export'),
+                                   {'student_name': 'John'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['unique_code'], self.certificate.unique_code)
+        self.assertEqual(rows[0]['student_id'], 'STU001')
+        self.assertEqual(rows[0]['course_name'], 'Python Programming')
+        self.assertEqual(rows[0]['expiry_date'], '')
+
+    def test_export_ndjson(self):
+        """Test streaming NDJSON export selected with ?format="""
+        response = self.client.get(reverse('certificate-export'),
+                                   {'format': 'ndjson', 'status': 'revoked'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response = self.client.get(reverse('certificate-export'),
+                                   {'format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        row = json.loads(lines[0])
+        self.assertEqual(row['id'], str(self.certificate.id))
+        self.assertEqual(row['created_by_email'], 'test@example.com')
+
+    def test_export_requires_admin(self):
+        """Test export errors are still rendered as JSON"""
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('certificate-export'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', json.loads(response.content))
+
+
+class ScanViewTest(TestCase):
+    """Tests for the async scan views, against the DRF actions they mirror"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123')
+        self.student = Student.objects.create(
+            student_id='STU001', first_name='John', last_name='Doe')
+        self.course = Course.objects.create(name='Python Programming', duration=10)
+        self.certificate = Certificate.objects.create(
+            student=self.student, course=self.course,
+            issue_date=date.today(), created_by=self.user)
+        self.validate_url = reverse('scan_validate')
+        self.qr_code_url = reverse('scan_qr_code', args=[self.certificate.id])
+        cache.clear()
+
+    async def test_validate(self):
+        """Test the scan view returns the validate action's body and headers"""
+        params = {'code': self.certificate.unique_code}
+        response = await self.async_client.get(self.validate_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = await self.async_client.get(reverse('certificate-validate'), params)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual(response['ETag'], expected['ETag'])
+        self.assertEqual(response['Cache-Control'], expected['Cache-Control'])
+
+        response = await self.async_client.get(
+            self.validate_url, params, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_served_through_middleware(self):
+        """Test scans pass through the project middleware like other views"""
+        response = await self.async_client.get(
+            self.validate_url, {'code': self.certificate.unique_code})
+        self.assertTrue(hasattr(response.asgi_request, 'session'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    async def test_validate_errors(self):
+        """Test missing codes, bad tokens and other methods are rejected"""
+        response = await self.async_client.get(self.validate_url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = await self.async_client.get(self.validate_url, {'token': 'x.y.z'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(json.loads(response.content)['is_valid'])
+        response = await self.async_client.post(self.validate_url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    @override_settings(CERTIFICATE_TOKEN_KEYS={'k1': 'test-token-secret'})
+    async def test_validate_token(self):
+        """Test signed tokens are validated with only a status lookup"""
+        token = issue_certificate_token(self.certificate)
+        response = await self.async_client.get(self.validate_url, {'token': token})
+        data = json.loads(response.content)
+        self.assertTrue(data['is_valid'])
+        self.assertEqual(data['unique_code'], self.certificate.unique_code)
+
+    async def test_qr_code(self):
+        """Test the scan view returns the qr-code action's image"""
+        response = await self.async_client.get(self.qr_code_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        expected = await self.async_client.get(
+            reverse('certificate-qr-code', args=[self.certificate.id]))
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = await self.async_client.get(
+            self.qr_code_url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_qr_code_formats_and_options(self):
+        """Test formats are negotiated and options validated like the DRF action"""
+        response = await self.async_client.get(
+            self.qr_code_url, headers={'Accept': 'image/svg+xml'})
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        response = await self.async_client.get(
+            self.qr_code_url, headers={'Accept': 'image/avif,image/webp,*/*'})
+        self.assertEqual(response['Content-Type'], 'image/png')
+        response = await self.async_client.get(
+            self.qr_code_url, {'format': 'webp', 'box_size': 4, 'error_correction': 'H'})
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        response = await self.async_client.get(self.qr_code_url, {'box_size': 7})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('box_size', json.loads(response.content))
+        response = await self.async_client.get(self.qr_code_url, {'format': 'gif'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get(
+            reverse('scan_qr_code', args=['00000000-0000-0000-0000-000000000000']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jose import JWTError, jwt
+
+
+class CertificateTokenError(Exception):
+    """Raised when a certificate token is malformed, unsigned or tampered."""
+
+
+def issue_certificate_token(certificate):
+    """
+    Return a signed token carrying what a validator needs to check a
+    certificate offline: id, unique code, status at issue and expiry date.
+
+    ``iat`` is when the certificate was last saved, so a token re-issued
+    after a revocation or restore is newer than the one it replaces.
+    Claims only depend on the certificate, so the token (and the QR code
+    embedding it) is stable between renders.
+    """
+    key_id = settings.CERTIFICATE_TOKEN_KEY_ID
+    if key_id not in settings.CERTIFICATE_TOKEN_KEYS:
+        raise ImproperlyConfigured(
+            f'No certificate token key {key_id!r}; set CERTIFICATE_TOKEN_SECRET')
+    claims = {
+        'cid': str(certificate.id),
+        'code': certificate.unique_code,
+        'st': certificate.status,
+        'exd': certificate.expiry_date.isoformat() if certificate.expiry_date else None,
+        'iat': int(certificate.updated_at.timestamp()),
+    }
+    return jwt.encode(
+        claims,
+        settings.CERTIFICATE_TOKEN_KEYS[key_id],
+        algorithm=settings.CERTIFICATE_TOKEN_ALGORITHM,
+        headers={'kid': key_id},
+    )
+
+
+def verify_certificate_token(token):
+    """Check a token's signature and return its claims."""
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError as exc:
+        raise CertificateTokenError(str(exc))
+    key_id = header.get('kid') if isinstance(header, dict) else None
+    if not isinstance(key_id, str):
+        raise CertificateTokenError('Missing or malformed key id')
+    verify_keys = settings.CERTIFICATE_TOKEN_VERIFY_KEYS or settings.CERTIFICATE_TOKEN_KEYS
+    if key_id not in verify_keys:
+        raise CertificateTokenError('Unknown key id')
+    try:
+        return jwt.decode(
+            token,
+            verify_keys[key_id],
+            algorithms=[settings.CERTIFICATE_TOKEN_ALGORITHM],
+        )
+    except JWTError as exc:
+        raise CertificateTokenError(str(exc))
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import StudentViewSet, CertificateViewSet, CourseViewSet
-from . import views
+from . import scan, views
 
 # app_name = 'certificate'
 
@@ -12,6 +12,9 @@ router.register(r'courses', CourseViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('scan/validate/', scan.validate, name='scan_validate'),
+    path('scan/certificates/<uuid:pk>/qr-code/', scan.qr_code, name='scan_qr_code'),
+    path('revocations/<str:name>', views.RevocationFileView.as_view(), name='revocation_file'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('admin/change-user-password/', views.AdminChangeUserPasswordView.as_view(), name='admin_change_user_password'),
     path('admin/users/', views.UsersListView.as_view(), name='get_users_list'),
@@ -1,34 +1,367 @@
+import hashlib
+import itertools
+import json
+import struct
+import threading
+import zipfile
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
 import qrcode
 from io import BytesIO
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
 from django.urls import reverse
 
+from .tokens import issue_certificate_token
 
-def generate_qr_code(certificate):
+
+def get_validation_url():
+    """Return the absolute URL of the certificate validation endpoint."""
+    return settings.BASE_URL + reverse(settings.QR_CODE_VALIDATION_URL_NAME)
+
+
+# Certificate fields get_qr_data() reads, for querysets narrowed with only()
+QR_DATA_FIELDS = ['id', 'unique_code', 'status', 'expiry_date', 'updated_at']
+
+
+def get_qr_data(certificate, validation_url=None):
     """
-    Generate a QR code for a certificate.
-    The QR code will contain a URL to validate the certificate.
+    Return the validation URL encoded in a certificate's QR code.
+    With QR_CODE_SIGNED_TOKENS on, it also carries a signed token that can
+    be verified offline.
     """
-    # Generate the validation URL
-    validation_url = settings.BASE_URL + reverse('certificate-validate')
+    if validation_url is None:
+        validation_url = get_validation_url()
     qr_data = f"{validation_url}?code={certificate.unique_code}"
+    if settings.QR_CODE_SIGNED_TOKENS:
+        qr_data += f"&token={issue_certificate_token(certificate)}"
+    return qr_data
+
+
+QR_RENDER_DEFAULTS = {
+    'box_size': 10,
+    'border': 4,
+    'error_correction': qrcode.constants.ERROR_CORRECT_L,
+    'image_format': 'png',
+}
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def _png_chunk(tag, data):
+    return (struct.pack('>I', len(data)) + tag + data
+            + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+
+def pack_qr_scanlines(matrix, box_size):
+    """
+    Scale a module matrix into packed 1-bit rows (dark modules are 0 bits),
+    returning ``(width, height, rows)``.  Each module row is packed once
+    and repeated ``box_size`` times.
+    """
+    cells = ('1' * box_size, '0' * box_size)
+    width = len(matrix[0]) * box_size
+    padding = '1' * (-width % 8)
+    row_bytes = (width + 7) // 8
+    rows = []
+    for modules in matrix:
+        bits = ''.join([cells[dark] for dark in modules]) + padding
+        rows.extend([int(bits, 2).to_bytes(row_bytes, 'big')] * box_size)
+    return width, len(rows), rows
+
+
+def encode_qr_png(matrix, box_size):
+    """Encode a module matrix as a 1-bit grayscale PNG without PIL."""
+    width, height, rows = pack_qr_scanlines(matrix, box_size)
+    # Every scanline is prefixed with filter type 0 (None)
+    raw = b''.join(b'\x00' + row for row in rows)
+    header = struct.pack('>IIBBBBB', width, height, 1, 0, 0, 0, 0)
+    return b''.join([
+        PNG_SIGNATURE,
+        _png_chunk(b'IHDR', header),
+        _png_chunk(b'IDAT', zlib.compress(raw)),
+        _png_chunk(b'IEND', b''),
+    ])
+
+
+def encode_qr_svg(matrix, box_size):
+    """
+    Encode a module matrix as SVG: one path of horizontal runs of dark
+    modules, in module units scaled up by ``box_size``.
+    """
+    size = len(matrix)
+    runs = []
+    for y, modules in enumerate(matrix):
+        x = 0
+        for dark, group in itertools.groupby(modules):
+            length = len(list(group))
+            if dark:
+                runs.append(f'M{x} {y}h{length}v1h-{length}z')
+            x += length
+    pixels = size * box_size
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{pixels}" height="{pixels}" viewBox="0 0 {size} {size}" '
+        'shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(runs)}" fill="#000"/></svg>'
+    ).encode('ascii')
+
+
+def encode_qr_webp(matrix, box_size):
+    """Encode a module matrix as lossless WebP from its packed scanlines."""
+    from PIL import Image
+
+    width, height, rows = pack_qr_scanlines(matrix, box_size)
+    image = Image.frombytes('1', (width, height), b''.join(rows))
+    buffer = BytesIO()
+    image.convert('L').save(buffer, format='WEBP', lossless=True)
+    return buffer.getvalue()
 
-    # Create QR code instance
+
+QR_IMAGE_ENCODERS = {
+    'png': encode_qr_png,
+    'svg': encode_qr_svg,
+    'webp': encode_qr_webp,
+}
+
+
+def build_qr_matrix(qr_data, border=4,
+                    error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """Return the module matrix for ``qr_data``, quiet zone included."""
     qr = qrcode.QRCode(
         version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+        error_correction=error_correction,
+        border=border,
     )
     qr.add_data(qr_data)
     qr.make(fit=True)
+    return qr.get_matrix()
 
-    # Create an image from the QR Code
-    qr_image = qr.make_image(fill_color="black", back_color="white")
 
-    # Convert to BytesIO
-    buffer = BytesIO()
-    qr_image.save(buffer, format='PNG')
-    buffer.seek(0)
+def render_qr_code(qr_data, box_size=10, border=4,
+                   error_correction=qrcode.constants.ERROR_CORRECT_L,
+                   image_format='png'):
+    """Render ``qr_data`` as PNG, SVG or WebP bytes."""
+    matrix = build_qr_matrix(qr_data, border, error_correction)
+    return QR_IMAGE_ENCODERS[image_format](matrix, box_size)
+
+
+def generate_qr_code(certificate):
+    """
+    Generate a QR code for a certificate.
+    The QR code will contain a URL to validate the certificate.
+    """
+    return BytesIO(render_qr_code(get_qr_data(certificate)))
+
+
+async def cache_acall(cache, name, *args):
+    """
+    Await ``cache.<name>(*args)``.  Django's built-in backends implement
+    aget() and friends with a thread-sensitive sync_to_async, which under
+    ASGI starts a thread per request; their clients are thread-safe, so the
+    sync method runs in the event loop's shared executor instead.  Backends
+    with native async methods are awaited directly, and in-process memory
+    caches, which do no I/O, are called inline.
+    """
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return getattr(cache, name)(*args)
+    async_method = getattr(type(cache), f'a{name}')
+    if async_method is not getattr(BaseCache, f'a{name}'):
+        return await async_method(cache, *args)
+    return await sync_to_async(getattr(cache, name), thread_sensitive=False)(*args)
+
+
+class QRCodeCache:
+    """
+    Two-tier cache for rendered QR images.
+
+    Images are keyed by a hash of the QR payload and render parameters, so
+    identical renders are shared.  The first tier is an in-process LRU bounded
+    by ``QR_CODE_CACHE_MAX_BYTES``; the second is the Django cache named by
+    ``QR_CODE_CACHE_ALIAS``, which can be shared between workers.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(qr_data, **params):
+        material = json.dumps({'data': qr_data, **params}, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        content = self._recall(key)
+        if content is None:
+            content = caches[settings.QR_CODE_CACHE_ALIAS].get(f'qr:{key}')
+            if content is not None:
+                self._remember(key, content)
+        return content
+
+    def set(self, key, content):
+        caches[settings.QR_CODE_CACHE_ALIAS].set(
+            f'qr:{key}', content, settings.QR_CODE_CACHE_TIMEOUT)
+        self._remember(key, content)
+
+    async def aget(self, key):
+        content = self._recall(key)
+        if content is None:
+            content = await cache_acall(
+                caches[settings.QR_CODE_CACHE_ALIAS], 'get', f'qr:{key}')
+            if content is not None:
+                self._remember(key, content)
+        return content
+
+    async def aset(self, key, content):
+        await cache_acall(caches[settings.QR_CODE_CACHE_ALIAS], 'set',
+                          f'qr:{key}', content, settings.QR_CODE_CACHE_TIMEOUT)
+        self._remember(key, content)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _recall(self, key):
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+            return content
+
+    def _remember(self, key, content):
+        max_bytes = settings.QR_CODE_CACHE_MAX_BYTES
+        if len(content) > max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = content
+            self._size += len(content)
+            while self._size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+qr_code_cache = QRCodeCache()
+
+
+def get_qr_code_key(certificate, **params):
+    """
+    Return ``(key, qr_data, params)`` for a certificate's QR image, with
+    ``params`` filled in from QR_RENDER_DEFAULTS.
+    """
+    params = {**QR_RENDER_DEFAULTS, **params}
+    qr_data = get_qr_data(certificate)
+    return QRCodeCache.make_key(qr_data, **params), qr_data, params
+
+
+def get_cached_qr_code(key, qr_data, params):
+    """Return the QR image for ``key``, rendering it on a cache miss."""
+    content = qr_code_cache.get(key)
+    if content is None:
+        content = render_qr_code(qr_data, **params)
+        qr_code_cache.set(key, content)
+    return content
+
+
+def get_qr_code_image(certificate, **params):
+    """
+    Return ``(content, etag)`` for a certificate's QR image, rendering it
+    only when neither cache tier holds it.
+    """
+    key, qr_data, params = get_qr_code_key(certificate, **params)
+    return get_cached_qr_code(key, qr_data, params), f'"{key}"'
+
+
+def render_qr_batch(batch):
+    """Render a list of ``(name, qr_data)`` pairs to ``(name, png)`` pairs."""
+    return [(name, render_qr_code(qr_data)) for name, qr_data in batch]
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def imap_bounded(func, iterable, workers, prefetch=2):
+    """
+    Map ``func`` over ``iterable`` in a process pool, yielding results in
+    order while keeping at most ``workers * prefetch`` tasks in flight.
+    """
+    if workers <= 1:
+        yield from map(func, iterable)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in iterable:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= workers * prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class _ZipStream:
+    """Write-only file object that hands back what zipfile writes to it."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
 
-    return buffer
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries):
+    """Yield a ZIP archive of ``(name, content)`` pairs chunk by chunk."""
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, content in entries:
+            archive.writestr(name, content)
+            yield stream.drain()
+    yield stream.drain()
+
+
+def iter_qr_code_zip(certificates):
+    """
+    Stream a ZIP of QR images for ``certificates``.
+    Images are rendered in batches across a process pool.
+    """
+    validation_url = get_validation_url()
+    entries = (
+        (f'certificate_{certificate.id}_qrcode.png',
+         get_qr_data(certificate, validation_url))
+        for certificate in certificates
+    )
+    rendered = imap_bounded(
+        render_qr_batch,
+        chunked(entries, settings.QR_BULK_EXPORT_BATCH_SIZE),
+        settings.QR_BULK_EXPORT_WORKERS,
+    )
+    return iter_zip(itertools.chain.from_iterable(rendered))
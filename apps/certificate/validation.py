@@ -0,0 +1,245 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+
+from .models import Certificate
+from .serializers import CERTIFICATE_SERIALIZER_FIELDS, CertificateValidationSerializer
+from .tokens import verify_certificate_token
+from .utils import cache_acall, chunked
+
+
+def get_validation_cache():
+    return caches[settings.VALIDATION_CACHE_ALIAS]
+
+
+def validation_cache_key(unique_code):
+    digest = hashlib.sha256(unique_code.encode('utf-8')).hexdigest()
+    return f'certificate-validation:{digest}'
+
+
+def build_validation_result(unique_code, certificate):
+    """Build the validate endpoint's response body for a looked-up code."""
+    if certificate is None:
+        return {
+            'unique_code': unique_code,
+            'is_valid': False,
+            'message': 'Certificate not found'
+        }
+    is_valid = certificate.status == 'active'
+    message = 'Certificate is valid' if is_valid else 'Certificate is not valid'
+    return CertificateValidationSerializer({
+        'unique_code': unique_code,
+        'is_valid': is_valid,
+        'certificate': certificate,
+        'message': message
+    }).data
+
+
+def build_validation_entry(unique_code, certificate):
+    """
+    Build a cacheable validation entry: the response body plus the ETag
+    and Last-Modified timestamp used for HTTP caching.
+    """
+    data = build_validation_result(unique_code, certificate)
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    last_modified = None
+    if certificate is not None:
+        last_modified = int(max(
+            certificate.updated_at,
+            certificate.student.updated_at,
+            certificate.course.updated_at,
+        ).timestamp())
+    return {
+        'data': data,
+        'etag': '"%s"' % hashlib.sha256(body.encode('utf-8')).hexdigest(),
+        'last_modified': last_modified,
+    }
+
+
+def validation_queryset():
+    return Certificate.objects.select_related(
+        'student', 'course', 'created_by'
+    ).only(*CERTIFICATE_SERIALIZER_FIELDS)
+
+
+def capped_cache_timeout(timeout):
+    """
+    Limit ``timeout`` to VALIDATION_LOCAL_CACHE_TIMEOUT on a process-local
+    cache, which only sees the invalidations made by its own worker.
+    """
+    if isinstance(get_validation_cache(), LocMemCache):
+        return min(timeout, settings.VALIDATION_LOCAL_CACHE_TIMEOUT)
+    return timeout
+
+
+def validation_cache_timeout(certificate):
+    """Unknown codes are cached for a shorter time."""
+    if certificate is None:
+        return capped_cache_timeout(settings.VALIDATION_CACHE_NOT_FOUND_TIMEOUT)
+    return capped_cache_timeout(settings.VALIDATION_CACHE_TIMEOUT)
+
+
+def get_validation_entry(unique_code):
+    """
+    Return the validation entry for ``unique_code``, reading through the
+    validation cache.
+    """
+    cache = get_validation_cache()
+    key = validation_cache_key(unique_code)
+    entry = cache.get(key)
+    if entry is None:
+        certificate = validation_queryset().filter(unique_code=unique_code).first()
+        entry = build_validation_entry(unique_code, certificate)
+        cache.set(key, entry, validation_cache_timeout(certificate))
+    return entry
+
+
+async def aget_validation_entry(unique_code):
+    """Async version of get_validation_entry()."""
+    cache = get_validation_cache()
+    key = validation_cache_key(unique_code)
+    entry = await cache_acall(cache, 'get', key)
+    if entry is None:
+        certificate = await validation_queryset().filter(unique_code=unique_code).afirst()
+        entry = build_validation_entry(unique_code, certificate)
+        await cache_acall(cache, 'set', key, entry, validation_cache_timeout(certificate))
+    return entry
+
+
+def validation_etag(entry, renderer_format='json'):
+    """Return the ETag of ``entry`` rendered in ``renderer_format``."""
+    if renderer_format == 'json':
+        return entry['etag']
+    return '%s-%s"' % (entry['etag'][:-1], renderer_format)
+
+
+def patch_validation_response(response, entry, renderer_format='json'):
+    """
+    Add the HTTP caching headers of a GET validation response: ETag,
+    Last-Modified and a short public max-age.  Other renderings than JSON,
+    such as browsable API pages carrying a CSRF token, are only cached
+    privately.
+    """
+    response['ETag'] = validation_etag(entry, renderer_format)
+    if entry['last_modified'] is not None:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        max_age = settings.VALIDATION_HTTP_MAX_AGE
+    else:
+        max_age = settings.VALIDATION_HTTP_NOT_FOUND_MAX_AGE
+    if renderer_format == 'json':
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def get_validation_entries(unique_codes):
+    """
+    Return ``{unique_code: entry}`` for many codes at once: one cache
+    round trip, then a single ``unique_code__in`` query for the misses.
+    """
+    cache = get_validation_cache()
+    keys = {validation_cache_key(code): code for code in unique_codes}
+    entries = {keys[key]: entry for key, entry in cache.get_many(keys).items()}
+
+    missing = [code for code in keys.values() if code not in entries]
+    if missing:
+        certificates = validation_queryset().filter(unique_code__in=missing)
+        found = {certificate.unique_code: certificate for certificate in certificates}
+        fresh, not_found = {}, {}
+        for code in missing:
+            entry = build_validation_entry(code, found.get(code))
+            entries[code] = entry
+            (fresh if code in found else not_found)[validation_cache_key(code)] = entry
+        cache.set_many(fresh, capped_cache_timeout(settings.VALIDATION_CACHE_TIMEOUT))
+        cache.set_many(not_found, capped_cache_timeout(
+            settings.VALIDATION_CACHE_NOT_FOUND_TIMEOUT))
+    return entries
+
+
+def certificate_status_cache_key(certificate_id):
+    return f'certificate-status:{certificate_id}'
+
+
+def get_certificate_status(certificate_id):
+    """
+    Return a certificate's current status, or None if it no longer exists.
+    This is the only database read needed to validate a signed token.
+    """
+    cache = get_validation_cache()
+    key = certificate_status_cache_key(certificate_id)
+    certificate_status = cache.get(key)
+    if certificate_status is None:
+        certificate_status = Certificate.objects.filter(
+            id=certificate_id).values_list('status', flat=True).first() or ''
+        cache.set(key, certificate_status,
+                  capped_cache_timeout(settings.VALIDATION_CACHE_TIMEOUT))
+    return certificate_status or None
+
+
+async def aget_certificate_status(certificate_id):
+    """Async version of get_certificate_status()."""
+    cache = get_validation_cache()
+    key = certificate_status_cache_key(certificate_id)
+    certificate_status = await cache_acall(cache, 'get', key)
+    if certificate_status is None:
+        certificate_status = await Certificate.objects.filter(
+            id=certificate_id).values_list('status', flat=True).afirst() or ''
+        await cache_acall(cache, 'set', key, certificate_status,
+                          capped_cache_timeout(settings.VALIDATION_CACHE_TIMEOUT))
+    return certificate_status or None
+
+
+def validate_certificate_token(token):
+    """
+    Validate a signed QR token.  The signature proves the claims; only the
+    revocation state is looked up.  Raises CertificateTokenError for
+    tokens that do not verify.
+    """
+    claims = verify_certificate_token(token)
+    return build_token_result(claims, get_certificate_status(claims['cid']))
+
+
+async def avalidate_certificate_token(token):
+    """Async version of validate_certificate_token()."""
+    claims = verify_certificate_token(token)
+    return build_token_result(claims, await aget_certificate_status(claims['cid']))
+
+
+def build_token_result(claims, certificate_status):
+    """Build the validate endpoint's response body for verified token claims."""
+    expired = (claims.get('exd') is not None
+               and claims['exd'] < timezone.localdate().isoformat())
+    if certificate_status is None:
+        is_valid, message = False, 'Certificate not found'
+    elif certificate_status != 'active' or expired:
+        is_valid, message = False, 'Certificate is not valid'
+    else:
+        is_valid, message = True, 'Certificate is valid'
+    return {
+        'unique_code': claims['code'],
+        'is_valid': is_valid,
+        'status': 'expired' if expired and certificate_status == 'active' else certificate_status,
+        'token': claims,
+        'message': message,
+    }
+
+
+def invalidate_validation_results(unique_codes):
+    """Drop cached validation responses for ``unique_codes``."""
+    cache = get_validation_cache()
+    for codes in chunked(unique_codes, 500):
+        cache.delete_many([validation_cache_key(code) for code in codes])
+
+
+def invalidate_certificates(queryset):
+    """Drop cached validation responses for every certificate in ``queryset``."""
+    invalidate_validation_results(
+        queryset.order_by().values_list('unique_code', flat=True).iterator())
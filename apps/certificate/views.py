@@ -1,28 +1,122 @@
 from rest_framework import viewsets
+from rest_framework.generics import get_object_or_404
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import AllowAny
 from django_filters import rest_framework as filters
-from django.http import HttpResponse
+from django.db.models import Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from .models import Student, Certificate, Course
 from .serializers import (
-    StudentSerializer, CertificateSerializer,
-    CertificateValidationSerializer, CourseSerializer
+    StudentSerializer, CertificateSerializer, CourseSerializer,
+    CertificateIdListSerializer, CertificateBatchValidationSerializer,
+    QRCodeOptionsSerializer, QRSheetOptionsSerializer
+)
+from .utils import (
+    QR_DATA_FIELDS, get_cached_qr_code, get_qr_code_key, iter_qr_code_zip
+)
+from .jobs import has_stored_qr_image
+from .serving import serve_stored_file
+from .rows import certificate_rows, course_rows, student_rows
+from .sheets import QR_SHEET_FIELDS, iter_qr_sheet_pdf, iter_qr_sheet_zip
+from .revocation import MANIFEST_NAME, revocation_file_path
+from .negotiation import PreferredFormatNegotiation
+from .pagination import SelectablePagination
+from .parsers import FastJSONParser
+from .renderers import (
+    CSVRenderer, NDJSONRenderer, PDFRenderer, PNGRenderer, SVGRenderer,
+    WebPRenderer, ZIPRenderer
 )
-from .utils import generate_qr_code
+from .exports import iter_certificates_csv, iter_certificates_ndjson
+from .documents import (
+    CERTIFICATE_DOCUMENT_FIELDS, certificate_document, iter_certificate_pdf_zip,
+    render_certificate_pdf
+)
+from .validation import (
+    get_validation_entries, get_validation_entry, patch_validation_response,
+    validate_certificate_token, validation_etag
+)
+from .tokens import CertificateTokenError
+from .bulk import import_students, issue_certificates, iter_upload_rows
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import update_session_auth_hash
 from .serializers import ChangePasswordSerializer, AdminChangeUserPasswordSerializer
 
 
+def split_query_list(request, name):
+    """Return the comma-separated ``name`` query parameter as a list, or None if absent."""
+    if name not in request.query_params:
+        return None
+    return [item.strip() for item in request.query_params[name].split(',') if item.strip()]
+
+
+class ValuesReadMixin:
+    """
+    List and retrieve through ``row_serializer``, building the response
+    from values() rows instead of serializing model instances.
+
+    ``?fields=`` picks the output fields and ``?expand=`` the nested
+    objects rendered in full, others being rendered as their id; without
+    either the full serializer shape is returned.
+    """
+    row_serializer = None
+
+    def get_row_serializer(self):
+        return self.row_serializer.shape(
+            fields=split_query_list(self.request, 'fields'),
+            expand=split_query_list(self.request, 'expand'))
+
+    def get_row_queryset(self, row_serializer):
+        return self.filter_queryset(self.get_queryset()).values(
+            *row_serializer.columns)
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        queryset = self.get_row_queryset(row_serializer)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.many(page))
+        return Response(row_serializer.many(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_row_queryset(row_serializer),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(row_serializer.to_representation(row))
+
+
+def name_search_query(value, prefix=''):
+    """
+    Match every whitespace-separated term of ``value`` against first or last
+    name, so "first last" full-name queries work.  On PostgreSQL the
+    icontains lookups are served by the trigram indexes from migration 0007.
+    """
+    query = Q()
+    for term in value.split():
+        query &= (
+            Q(**{f'{prefix}first_name__icontains': term})
+            | Q(**{f'{prefix}last_name__icontains': term})
+        )
+    return query
+
+
 class StudentFilter(filters.FilterSet):
     """Filter for Student model."""
     name = filters.CharFilter(method='filter_by_name')
@@ -36,23 +130,39 @@ class StudentFilter(filters.FilterSet):
         fields = ['student_id', 'email']
 
     def filter_by_name(self, queryset, name, value):
-        return queryset.filter(
-            first_name__icontains=value
-        ) | queryset.filter(
-            last_name__icontains=value
-        )
+        return queryset.filter(name_search_query(value))
 
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     """ViewSet for Student model."""
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
+    row_serializer = student_rows
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = SelectablePagination
     filterset_class = StudentFilter
     search_fields = ['first_name', 'last_name', 'student_id', 'email']
     ordering_fields = ['created_at', 'first_name', 'last_name', 'student_id']
     ordering = ['-created_at']
 
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser])
+    def import_students(self, request):
+        """
+        Upsert students on student_id from an uploaded CSV or NDJSON ``file``.
+        The file is read row by row and written in batches.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV or NDJSON file is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = iter_upload_rows(upload)
+        except ValueError as exc:
+            return Response({'error': str(exc)},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(import_students(rows))
+
 
 class CertificateFilter(filters.FilterSet):
     """Filter for Certificate model."""
@@ -63,11 +173,7 @@ class CertificateFilter(filters.FilterSet):
     expiry_date = filters.DateFilter()
 
     def filter_by_student_name(self, queryset, name, value):
-        return queryset.filter(
-            student__first_name__icontains=value
-        ) | queryset.filter(
-            student__last_name__icontains=value
-        )
+        return queryset.filter(name_search_query(value, prefix='student__'))
 
     class Meta:
         model = Certificate
@@ -75,11 +181,13 @@ class CertificateFilter(filters.FilterSet):
                   'issue_date', 'expiry_date', 'status']
 
 
-class CertificateViewSet(viewsets.ModelViewSet):
+class CertificateViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     """ViewSet for Certificate model."""
     queryset = Certificate.objects.all()
     serializer_class = CertificateSerializer
+    row_serializer = certificate_rows
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = SelectablePagination
     filterset_class = CertificateFilter
     search_fields = [
         'course__name', 'student__first_name',
@@ -91,63 +199,295 @@ class CertificateViewSet(viewsets.ModelViewSet):
     ]
     ordering = ['-created_at']
 
-    @action(detail=True, methods=['get'], permission_classes=[], url_path='qr-code')
+    @action(detail=True, methods=['get'], permission_classes=[], url_path='qr-code',
+            renderer_classes=[PNGRenderer, SVGRenderer, WebPRenderer],
+            content_negotiation_class=PreferredFormatNegotiation)
     def qr_code(self, request, pk=None):
-        """Generate QR code for a certificate."""
+        """
+        Generate QR code for a certificate.
+
+        The image format (PNG, SVG or WebP) follows ``?format=`` or the
+        Accept header, staying PNG unless SVG or WebP is preferred over it
+        (browsers listing image/webp next to ``*/*`` get PNG); ``box_size``, ``border`` and ``error_correction``
+        (L, M, Q or H) are read from the query string.  The default PNG is
+        served from the image stored by ``render_qr_images`` when current.
+        """
         certificate = self.get_object()
-        qr_buffer = generate_qr_code(certificate)
-        response = HttpResponse(qr_buffer.getvalue(), content_type='image/png')
-        response['Content-Disposition'] = f'attachment; filename="certificate_{certificate.id}_qrcode.png"'
+        options = QRCodeOptionsSerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        image_format = request.accepted_renderer.format
+        key, qr_data, params = get_qr_code_key(
+            certificate, image_format=image_format, **options.validated_data)
+        etag = f'"{key}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content_type = request.accepted_renderer.media_type
+            filename = f'certificate_{certificate.id}_qrcode.{image_format}'
+            if has_stored_qr_image(certificate, key):
+                response = serve_stored_file(
+                    certificate.qr_image.name, content_type, filename,
+                    storage=certificate.qr_image.storage)
+            else:
+                response = HttpResponse(
+                    get_cached_qr_code(key, qr_data, params),
+                    content_type=content_type)
+                response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk-issue',
+            parser_classes=[FastJSONParser, MultiPartParser])
+    def bulk_issue(self, request):
+        """
+        Issue certificates in bulk from a JSON list of rows or an uploaded
+        CSV/NDJSON ``file`` with student_id, course_id, issue_date and
+        expiry_date columns.
+        """
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                rows = iter_upload_rows(upload)
+            except ValueError as exc:
+                return Response({'error': str(exc)},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            rows = request.data
+            if isinstance(rows, dict):
+                rows = rows.get('rows')
+            if not isinstance(rows, list):
+                return Response(
+                    {'error': 'Expected a list of rows or a CSV/NDJSON file'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        results = issue_certificates(rows, request.user)
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], url_path='export',
+            renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream the filtered certificates as CSV (default) or NDJSON, chosen
+        with ``?format=ndjson`` or the Accept header.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if request.accepted_renderer.format == 'ndjson':
+            content, extension = iter_certificates_ndjson(queryset), 'ndjson'
+        else:
+            content, extension = iter_certificates_csv(queryset), 'csv'
+        response = StreamingHttpResponse(
+            content, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="certificates.{extension}"'
+        return response
+
+    @action(detail=False, methods=['get', 'post'], url_path='qr-codes')
+    def qr_codes(self, request):
+        """
+        Stream a ZIP of QR codes for the filtered certificates, optionally
+        narrowed to a list of IDs (``?ids=a,b`` or ``{"ids": [...]}``).
+        """
+        queryset = self.filter_by_ids(
+            request, self.filter_queryset(self.get_queryset()))
+        certificates = queryset.only(*QR_DATA_FIELDS).iterator(chunk_size=2000)
+        response = StreamingHttpResponse(
+            iter_qr_code_zip(certificates), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="certificate_qrcodes.zip"'
         return response
 
-    @action(detail=False, methods=['post'], permission_classes=[], url_path='validate')
+    @action(detail=True, methods=['get'], url_path='pdf')
+    def pdf(self, request, pk=None):
+        """Render a printable PDF of the certificate with its QR code."""
+        # Load the student and course with the certificate, as ``pdfs`` does
+        queryset = self.filter_queryset(self.get_queryset()).select_related(
+            'student', 'course').only(*CERTIFICATE_DOCUMENT_FIELDS)
+        certificate = get_object_or_404(queryset, pk=pk)
+        self.check_object_permissions(request, certificate)
+        response = HttpResponse(
+            render_certificate_pdf(certificate_document(certificate)),
+            content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="certificate_{certificate.id}.pdf"'
+        return response
+
+    @action(detail=False, methods=['get', 'post'], url_path='pdfs')
+    def pdfs(self, request):
+        """
+        Stream a ZIP of certificate PDFs for the filtered certificates,
+        narrowed to a list of IDs like ``qr-codes``.
+        """
+        queryset = self.filter_by_ids(
+            request, self.filter_queryset(self.get_queryset()))
+        certificates = queryset.select_related('student', 'course').only(
+            *CERTIFICATE_DOCUMENT_FIELDS).iterator(chunk_size=2000)
+        response = StreamingHttpResponse(
+            iter_certificate_pdf_zip(certificates), content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="certificates.zip"'
+        return response
+
+    @action(detail=False, methods=['get', 'post'], url_path='qr-sheet',
+            renderer_classes=[PDFRenderer, ZIPRenderer])
+    def qr_sheet(self, request):
+        """
+        Stream printable label sheets of QR codes captioned with student and
+        course for the filtered certificates, narrowed like ``qr-codes``.
+        ``paper`` (a4, letter), ``columns`` and ``rows`` set the grid; the
+        output is a PDF, or a ZIP of PNG pages with ``?format=zip``.
+        """
+        options = QRSheetOptionsSerializer(data=request.query_params)
+        options.is_valid(raise_exception=True)
+        queryset = self.filter_by_ids(
+            request, self.filter_queryset(self.get_queryset()))
+        certificates = queryset.select_related('student', 'course').only(
+            *QR_SHEET_FIELDS).iterator(chunk_size=2000)
+        if request.accepted_renderer.format == 'zip':
+            content = iter_qr_sheet_zip(certificates, **options.validated_data)
+        else:
+            content = iter_qr_sheet_pdf(certificates, **options.validated_data)
+        response = StreamingHttpResponse(
+            content, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="qr_sheets.{request.accepted_renderer.format}"'
+        return response
+
+    def filter_by_ids(self, request, queryset):
+        """Narrow to ``?ids=a,b`` or ``{"ids": [...]}`` when given."""
+        if request.method == 'POST':
+            if not isinstance(request.data, dict):
+                raise ValidationError({'ids': ['Expected an object with an "ids" list.']})
+            ids = request.data.get('ids')
+        else:
+            ids = [
+                value for param in request.query_params.getlist('ids')
+                for value in param.split(',') if value
+            ] or None
+        if ids is not None:
+            serializer = CertificateIdListSerializer(data={'ids': ids})
+            serializer.is_valid(raise_exception=True)
+            queryset = queryset.filter(id__in=serializer.validated_data['ids'])
+        return queryset
+
+    @action(detail=False, methods=['get', 'post'], permission_classes=[], url_path='validate')
     def validate(self, request):
-        """Validate a certificate by its unique code."""
-        unique_code = request.data.get('unique_code')
+        """
+        Validate a certificate by its unique code.
+
+        POST takes ``unique_code`` in the body.  GET reads ``code`` from the
+        query string, as embedded in the QR code, and is cacheable by HTTP
+        caches through Cache-Control, ETag and Last-Modified.  A signed
+        ``token`` from the QR is verified cryptographically instead, with
+        only the revocation state looked up.
+        """
+        params = request.query_params if request.method == 'GET' else request.data
+        if not isinstance(params, dict):
+            return Response(
+                {'error': 'Expected an object with unique_code or token'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        unique_code = params.get('code' if request.method == 'GET' else 'unique_code')
+        token = params.get('token')
+        if token:
+            if not isinstance(token, str):
+                return Response(
+                    {'is_valid': False, 'message': 'Invalid certificate token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                return Response(validate_certificate_token(token))
+            except CertificateTokenError:
+                return Response(
+                    {'is_valid': False, 'message': 'Invalid certificate token'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         if not unique_code:
             return Response(
                 {'error': 'Unique code is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        try:
-            certificate = Certificate.objects.get(unique_code=unique_code)
-            is_valid = certificate.status == 'active'
-            message = 'Certificate is valid' if is_valid else 'Certificate is not valid'
-
-            serializer = CertificateValidationSerializer({
-                'unique_code': unique_code,
-                'is_valid': is_valid,
-                'certificate': certificate,
-                'message': message
-            })
-            return Response(serializer.data)
-
-        except Certificate.DoesNotExist:
+        if not isinstance(unique_code, str):
             return Response(
-                {
-                    'unique_code': unique_code,
-                    'is_valid': False,
-                    'message': 'Certificate not found'
-                },
-                status=status.HTTP_200_OK
+                {'error': 'Unique code must be a string'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
+        entry = get_validation_entry(unique_code)
+        if request.method != 'GET':
+            return Response(entry['data'])
+
+        renderer_format = request.accepted_renderer.format
+        response = get_conditional_response(
+            request, etag=validation_etag(entry, renderer_format),
+            last_modified=entry['last_modified'])
+        if response is None:
+            response = Response(entry['data'])
+        patch_vary_headers(response, ['Accept'])
+        return patch_validation_response(response, entry, renderer_format)
+
+    @action(detail=False, methods=['post'], permission_classes=[], url_path='validate-batch')
+    def validate_batch(self, request):
+        """
+        Validate up to VALIDATION_BATCH_MAX_CODES unique codes at once.
+        Results follow the input order and carry a per-code status of
+        valid, invalid or not_found.
+        """
+        serializer = CertificateBatchValidationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unique_codes = serializer.validated_data['unique_codes']
+
+        entries = get_validation_entries(unique_codes)
+        results = []
+        for unique_code in unique_codes:
+            data = entries[unique_code]['data']
+            if 'certificate' not in data:
+                code_status = 'not_found'
+            else:
+                code_status = 'valid' if data['is_valid'] else 'invalid'
+            results.append({**data, 'status': code_status})
+        return Response({'results': results})
+
     def get_permissions(self):
         if self.action == 'retrieve':
             return [AllowAny()]
         return super().get_permissions()
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ValuesReadMixin, viewsets.ModelViewSet):
     """ViewSet for Course model."""
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    row_serializer = course_rows
     permission_classes = [IsAuthenticated, IsAdminUser]
     search_fields = ['name', 'description']
     ordering_fields = ['created_at', 'name', 'duration']
     ordering = ['-created_at']
 
+class RevocationFileView(APIView):
+    """
+    Public download of the revocation manifest, snapshots and deltas
+    written by ``build_revocation_list``.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, name):
+        path = revocation_file_path(name)
+        if path is None or not default_storage.exists(path):
+            raise Http404
+        if name == MANIFEST_NAME:
+            response = serve_stored_file(path, 'application/json')
+            patch_cache_control(response, public=True, no_cache=True)
+        else:
+            response = serve_stored_file(path, 'application/octet-stream', name)
+            # Snapshots and deltas are named by version and never rewritten
+            patch_cache_control(
+                response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+        return response
+
+
 class ChangePasswordView(APIView):
     """
     تغییر پسورد کاربر فعلی
@@ -0,0 +1,78 @@
+"""
+Time JSON rendering and compression of a certificate list page.
+
+The page is built in memory like ``row_serializers.py``: its results come
+from ``certificate_rows``.  DRF's JSONRenderer is compared with
+FastJSONRenderer, and the rendered page is compressed with gzip and, when
+installed, brotli at the middleware's settings.
+
+    python benchmarks/json_render.py [rows] [iterations]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+from row_serializers import make_certificate, values_row  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.utils.text import compress_string  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from apps.certificate.middleware import brotli  # noqa: E402
+from apps.certificate.renderers import FastJSONRenderer  # noqa: E402
+from apps.certificate.rows import certificate_rows  # noqa: E402
+from apps.certificate.serializers import CertificateSerializer  # noqa: E402
+
+
+def bench(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = function()
+    return (time.perf_counter() - start) / iterations, result
+
+
+def report(label, elapsed, size=None):
+    line = f'{label:>30}: {elapsed * 1000:7.2f} ms'
+    if size is not None:
+        line += f'  {size / 1024:7.1f} KiB'
+    print(line)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    user = User(username='bench', email='bench@example.com')
+    certificates = [make_certificate(index, user) for index in range(rows)]
+    value_rows = [values_row(certificate) for certificate in certificates]
+    page = {'count': rows, 'next': None, 'previous': None,
+            'results': certificate_rows.many(value_rows)}
+
+    stdlib, content = bench(lambda: JSONRenderer().render(page), iterations)
+    fast, _ = bench(lambda: FastJSONRenderer().render(page), iterations)
+    report('JSONRenderer', stdlib, len(content))
+    report('FastJSONRenderer', fast)
+    print(f'{"rendering":>30}: {stdlib / fast:7.1f}x faster')
+
+    before, _ = bench(lambda: JSONRenderer().render({
+        **page, 'results': CertificateSerializer(certificates, many=True).data}), 3)
+    after, _ = bench(lambda: FastJSONRenderer().render({
+        **page, 'results': certificate_rows.many(value_rows)}), iterations)
+    report('serializer + JSONRenderer', before)
+    report('rows + FastJSONRenderer', after)
+    print(f'{"serialize and render":>30}: {before / after:7.1f}x faster')
+
+    elapsed, compressed = bench(
+        lambda: compress_string(content, max_random_bytes=100), iterations)
+    report('gzip', elapsed, len(compressed))
+    if brotli is not None:
+        elapsed, compressed = bench(lambda: brotli.compress(
+            content, quality=settings.RESPONSE_COMPRESSION_BROTLI_QUALITY), iterations)
+        report('brotli', elapsed, len(compressed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Compare the PIL QR render path with the direct zlib PNG encoder.
+
+Both paths share the QR math (``qr.make(fit=True)``), so the module matrix
+is built once per payload and the image stage is timed separately from the
+end-to-end render.
+
+    python benchmarks/qr_render.py [iterations]
+"""
+import io
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import qrcode  # noqa: E402
+
+from apps.certificate.utils import encode_qr_png, render_qr_code  # noqa: E402
+
+BOX_SIZE = 10
+
+
+def make_qr(qr_data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=BOX_SIZE,
+        border=4,
+    )
+    qr.add_data(qr_data)
+    qr.make(fit=True)
+    return qr
+
+
+def pil_image(qr):
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def direct_image(qr):
+    return encode_qr_png(qr.get_matrix(), BOX_SIZE)
+
+
+def bench(render, items):
+    start = time.perf_counter()
+    sizes = [len(render(item)) for item in items]
+    return time.perf_counter() - start, sum(sizes) / len(sizes)
+
+
+def report(label, elapsed, iterations, size=None):
+    line = (f'{label:>18}: {iterations / elapsed:8.1f}/s  '
+            f'{elapsed / iterations * 1000:6.2f} ms')
+    if size is not None:
+        line += f'  {size:6.0f} bytes avg'
+    print(line)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    payloads = [
+        f'http://localhost:8000/api/certificates/validate/?code={uuid.uuid4()}'
+        for _ in range(iterations)
+    ]
+
+    start = time.perf_counter()
+    qrs = [make_qr(payload) for payload in payloads]
+    report('QR math', time.perf_counter() - start, iterations)
+
+    pil_elapsed, pil_size = bench(pil_image, qrs)
+    direct_elapsed, direct_size = bench(direct_image, qrs)
+    report('PIL image + PNG', pil_elapsed, iterations, pil_size)
+    report('direct PNG', direct_elapsed, iterations, direct_size)
+
+    end_to_end, _ = bench(render_qr_code, payloads)
+    report('render_qr_code', end_to_end, iterations)
+
+    print(f'image stage: {pil_elapsed / direct_elapsed:.1f}x faster, '
+          f'{1 - direct_size / pil_size:.0%} smaller')
+
+
+if __name__ == '__main__':
+    main()
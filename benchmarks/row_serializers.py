@@ -0,0 +1,83 @@
+"""
+Compare CertificateSerializer with the values() row serializer.
+
+Rows are built in memory, so only serialization is timed: model instances
+for the DRF serializer and the equivalent values() dicts for
+``certificate_rows``.  No database is needed.
+
+    python benchmarks/row_serializers.py [rows]
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.certificate.models import Certificate, Course, Student  # noqa: E402
+from apps.certificate.rows import certificate_rows  # noqa: E402
+from apps.certificate.serializers import CertificateSerializer  # noqa: E402
+
+
+def make_certificate(index, user):
+    now = timezone.now()
+    student = Student(
+        id=uuid.uuid4(), student_id=f'S{index:06d}', first_name='Jane',
+        last_name=f'Doe {index}', email=f'jane{index}@example.com',
+        date_of_birth=date(2000, 1, 1), created_at=now, updated_at=now)
+    course = Course(
+        id=uuid.uuid4(), name='Python Programming', description='Intro course',
+        duration=40, created_at=now, updated_at=now)
+    return Certificate(
+        id=uuid.uuid4(), student=student, course=course, created_by=user,
+        issue_date=date.today(), expiry_date=date.today() + timedelta(days=365),
+        unique_code=uuid.uuid4().hex[:12].upper(), status='active',
+        signature='0' * 64, created_at=now, updated_at=now)
+
+
+def values_row(certificate):
+    """Return the dict values(*certificate_rows.columns) yields for ``certificate``."""
+    row = {}
+    for column in certificate_rows.columns:
+        value = certificate
+        for name in column.split('__'):
+            value = getattr(value, 'pk' if name == 'id' else name)
+        row[column] = value
+    return row
+
+
+def bench(serialize, items):
+    start = time.perf_counter()
+    serialize(items)
+    return time.perf_counter() - start
+
+
+def report(label, elapsed, rows):
+    print(f'{label:>22}: {elapsed * 1000:8.1f} ms  '
+          f'{elapsed / rows * 1e6:7.1f} us/row')
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    user = User(username='bench', email='bench@example.com')
+    certificates = [make_certificate(index, user) for index in range(rows)]
+    value_rows = [values_row(certificate) for certificate in certificates]
+
+    drf = bench(lambda items: CertificateSerializer(items, many=True).data, certificates)
+    fast = bench(certificate_rows.many, value_rows)
+    report('CertificateSerializer', drf, rows)
+    report('certificate_rows', fast, rows)
+    print(f'{drf / fast:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
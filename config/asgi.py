@@ -2,6 +2,8 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Static files are served by WhiteNoise ahead of Django, so that the Django
+middleware chain stays async; see MIDDLEWARE in settings.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -9,8 +11,29 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
 from django.core.asgi import get_asgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ['DJANGO_SERVER_INTERFACE'] = 'asgi'
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'Not Found']
+
+
+# Hashed names written by the manifest storage are cached forever
+static_application = WsgiToAsgi(WhiteNoise(
+    not_found, root=str(settings.STATIC_ROOT), prefix=settings.STATIC_URL,
+    immutable_file_test=r'^.+\.[0-9a-f]{12}\..+$'))
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(settings.STATIC_URL):
+        return await static_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -14,6 +14,8 @@ from datetime import timedelta
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,6 +57,7 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.certificate.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,6 +66,12 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# WhiteNoise's middleware is sync-only and under ASGI would put every request,
+# async scan views included, on a thread. config/asgi.py sets this variable
+# and serves static files in front of Django instead.
+if os.getenv('DJANGO_SERVER_INTERFACE') == 'asgi':
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -99,6 +108,36 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'certificate-cache'),
+    }
+}
+
+# Validation responses are cached per unique_code and invalidated on writes
+VALIDATION_CACHE_ALIAS = 'default'
+VALIDATION_CACHE_TIMEOUT = 60 * 60
+VALIDATION_CACHE_NOT_FOUND_TIMEOUT = 30
+# With a per-process LocMemCache, a write only invalidates the worker that
+# made it, so other workers' entries are kept this briefly instead
+VALIDATION_LOCAL_CACHE_TIMEOUT = int(os.getenv('VALIDATION_LOCAL_CACHE_TIMEOUT', 5))
+
+# Most unique codes accepted by a single validate-batch request
+VALIDATION_BATCH_MAX_CODES = 100
+
+# Cache-Control max-age of GET validation responses for HTTP caches. Kept
+# short so a revocation reaches scanners quickly; repeat scans revalidate
+# with If-None-Match and get a 304.
+VALIDATION_HTTP_MAX_AGE = 60
+VALIDATION_HTTP_NOT_FOUND_MAX_AGE = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -147,6 +186,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# Media files: generated artifacts such as revocation lists
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Create static directories if they don't exist
 os.makedirs(BASE_DIR / 'static', exist_ok=True)
 os.makedirs(BASE_DIR / 'staticfiles', exist_ok=True)
@@ -165,6 +208,15 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.certificate.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'apps.certificate.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': (
@@ -223,5 +275,89 @@ CORS_ALLOW_HEADERS = [
 # Base URL for the application
 BASE_URL = os.getenv('BASE_URL', 'http://localhost:8000')
 
+# URL name of the validation endpoint encoded in QR codes: 'certificate-validate'
+# (DRF view) or 'scan_validate' (async view, for ASGI deployments)
+QR_CODE_VALIDATION_URL_NAME = os.getenv('QR_CODE_VALIDATION_URL_NAME', 'certificate-validate')
+
+# QR code image cache: an in-process LRU bounded by QR_CODE_CACHE_MAX_BYTES,
+# backed by the Django cache named by QR_CODE_CACHE_ALIAS
+QR_CODE_CACHE_ALIAS = 'default'
+QR_CODE_CACHE_MAX_BYTES = int(os.getenv('QR_CODE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+QR_CODE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# QR code render options clients may request; kept small to bound the
+# number of cached variants per certificate
+QR_CODE_BOX_SIZES = [2, 4, 6, 8, 10, 12, 16, 20]
+QR_CODE_BORDERS = [0, 1, 2, 4]
+
+# Pre-rendered QR images: jobs claimed per worker batch, attempts before a
+# job is marked failed, and seconds after which a running job is reclaimed
+QR_RENDER_JOB_BATCH_SIZE = 50
+QR_RENDER_JOB_MAX_ATTEMPTS = 3
+QR_RENDER_JOB_TIMEOUT = 300
+
+# How stored files (QR images, revocation lists) are sent: 'django'
+# (FileResponse), 'x-accel-redirect' (nginx, internal location at
+# FILE_SERVING_ACCEL_PREFIX mapped to MEDIA_ROOT), 'x-sendfile' (Apache,
+# lighttpd) or 'redirect' (to the storage URL)
+FILE_SERVING_MODE = os.getenv('FILE_SERVING_MODE', 'django')
+FILE_SERVING_ACCEL_PREFIX = os.getenv('FILE_SERVING_ACCEL_PREFIX', '/protected-media/')
+
+# Responses of at least RESPONSE_COMPRESSION_MIN_SIZE bytes are compressed
+# with brotli (when installed and accepted) or gzip
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 5
+
+# Threads rendering QR images for the async scan views (apps.certificate.scan)
+QR_SCAN_RENDER_THREADS = int(os.getenv('QR_SCAN_RENDER_THREADS', os.cpu_count() or 1))
+
+# Bulk QR code export: certificates per render task and render processes
+QR_BULK_EXPORT_BATCH_SIZE = 100
+QR_BULK_EXPORT_WORKERS = int(os.getenv('QR_BULK_EXPORT_WORKERS', os.cpu_count() or 1))
+
+# Certificate PDFs: page resolution, optional TrueType font (Pillow's
+# built-in font otherwise), documents per render task and render processes
+CERTIFICATE_PDF_DPI = 300
+CERTIFICATE_PDF_FONT = os.getenv('CERTIFICATE_PDF_FONT') or None
+CERTIFICATE_PDF_BATCH_SIZE = 20
+CERTIFICATE_PDF_WORKERS = int(os.getenv('CERTIFICATE_PDF_WORKERS', os.cpu_count() or 1))
+
+# Rows per INSERT for bulk certificate issuance
+CERTIFICATE_BULK_BATCH_SIZE = 1000
+
+# Rows per upsert for bulk student imports
+STUDENT_IMPORT_BATCH_SIZE = 1000
+
+# Rows fetched per server-side cursor round trip for certificate exports
+CERTIFICATE_EXPORT_CHUNK_SIZE = 2000
+
+# Nightly signature audit (manage.py verify_signatures)
+SIGNATURE_AUDIT_CHUNK_SIZE = 5000
+SIGNATURE_AUDIT_WORKERS = int(os.getenv('SIGNATURE_AUDIT_WORKERS', os.cpu_count() or 1))
+
+# Signed certificate tokens embedded in QR codes for offline validation.
+# CERTIFICATE_TOKEN_KEYS maps key ids to signing keys; CERTIFICATE_TOKEN_KEY_ID
+# picks the one used for new tokens. With an asymmetric algorithm, put the
+# public keys in CERTIFICATE_TOKEN_VERIFY_KEYS. The key is handed to edge
+# validators, so it must not be SECRET_KEY; without CERTIFICATE_TOKEN_SECRET
+# no tokens are issued or accepted.
+QR_CODE_SIGNED_TOKENS = os.getenv('QR_CODE_SIGNED_TOKENS', '0') == '1'
+CERTIFICATE_TOKEN_ALGORITHM = 'HS256'
+CERTIFICATE_TOKEN_KEY_ID = os.getenv('CERTIFICATE_TOKEN_KEY_ID', 'k1')
+CERTIFICATE_TOKEN_SECRET = os.getenv('CERTIFICATE_TOKEN_SECRET')
+if CERTIFICATE_TOKEN_SECRET == SECRET_KEY:
+    raise ImproperlyConfigured('CERTIFICATE_TOKEN_SECRET must differ from SECRET_KEY')
+if QR_CODE_SIGNED_TOKENS and not CERTIFICATE_TOKEN_SECRET:
+    raise ImproperlyConfigured('QR_CODE_SIGNED_TOKENS requires CERTIFICATE_TOKEN_SECRET')
+CERTIFICATE_TOKEN_KEYS = {
+    CERTIFICATE_TOKEN_KEY_ID: CERTIFICATE_TOKEN_SECRET,
+} if CERTIFICATE_TOKEN_SECRET else {}
+CERTIFICATE_TOKEN_VERIFY_KEYS = {}
+
+# Revocation snapshots published by manage.py build_revocation_list under
+# MEDIA_ROOT/REVOCATION_LIST_PATH
+REVOCATION_LIST_PATH = 'revocations'
+REVOCATION_DELTAS_KEPT = 30
+
 # Whitenoise configuration
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'